@@ -0,0 +1,45 @@
+from __future__ import annotations
+from typing import Iterable
+
+from infinite_hash_table import InfiniteHashTable, MappedAlphabet
+
+
+def _sorted_counts(l: Iterable[str]) -> Iterable[tuple[str, int]]:
+    """
+    Count every distinct string, then yield (string, count) pairs in
+    ascending order.
+
+    The strings are loaded into an InfiniteHashTable whose alphabet holds
+    exactly their characters in order, so walking it in position order is a
+    most-significant-character radix sort.
+    """
+    counts = {}
+    for item in l:
+        counts[item] = counts.get(item, 0) + 1
+    table = InfiniteHashTable.from_items(counts, compress=True, alphabet=MappedAlphabet.from_keys(counts), sparse=True)
+    return table.iter_sorted()
+
+
+def radix_sort_strings(l: Iterable[str]) -> list[str]:
+    """
+    Sort strings without comparing them, keeping repeated strings.
+
+    :complexity: Best/Worst Case O(N + L + T*C + C*log(C)), where N is len(l),
+    L the total length of the distinct strings, T the number of sub-tables
+    created (at most L) and C the number of distinct characters.
+    :returns: The sorted list.
+    """
+    result = []
+    for item, count in _sorted_counts(l):
+        result.extend([item] * count)
+    return result
+
+
+def sorted_unique(l: Iterable[str]) -> list[str]:
+    """
+    Sort strings without comparing them, keeping one copy of each.
+
+    :complexity: See radix_sort_strings.
+    :returns: The sorted list of distinct strings.
+    """
+    return [item for item, _ in _sorted_counts(l)]
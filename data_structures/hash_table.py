@@ -7,7 +7,9 @@ __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
 
-from typing import TypeVar, Generic
+import pickle
+import struct
+from typing import BinaryIO, TypeVar, Generic
 from data_structures.referential_array import ArrayR
 
 K = TypeVar('K')
@@ -17,46 +19,151 @@ class FullError(Exception):
     pass
 
 
+class StringHasher:
+    """
+    Hash function for string keys.
+
+    A single instance is shared by every table using it: it is called with
+    the key and the table, and reads the size of the table on each call.
+    """
+
+    __slots__ = ("base",)
+
+    def __init__(self, base: int = 31) -> None:
+        self.base = base
+
+    def __call__(self, key: str, table: LinearProbeTable) -> int:
+        """
+        :complexity: O(len(key))
+        """
+        size = len(table.array)
+        value = 0
+        a = 31415
+        for char in key:
+            value = (ord(char) + a * value) % size
+            a = a * self.base % (size - 1)
+        return value
+
+
+class IntHasher:
+    """
+    Hash function for integer keys: the key itself, modulo the table size.
+
+    As the table sizes are primes, consecutive keys land in consecutive slots
+    and any regular stride is spread over the whole table.
+    """
+
+    __slots__ = ()
+
+    def __call__(self, key: int, table: LinearProbeTable) -> int:
+        """
+        :complexity: O(1)
+        """
+        return key % len(table.array)
+
+
+class TupleHasher:
+    """
+    Hash function for tuple keys, combining the hash of each item.
+
+    There is one instance per combination of item hashers, see hasher_for.
+    """
+
+    __slots__ = ("item_hashers", "base")
+
+    def __init__(self, item_hashers: tuple, base: int = 31) -> None:
+        self.item_hashers = item_hashers
+        self.base = base
+
+    def __call__(self, key: tuple, table: LinearProbeTable) -> int:
+        """
+        :complexity: O(sum of the item hashes)
+        """
+        size = len(table.array)
+        value = 0
+        for hasher, item in zip(self.item_hashers, key):
+            value = (value * self.base + hasher(item, table)) % size
+        return value
+
+
+def hasher_for(key) -> StringHasher | IntHasher | TupleHasher:
+    """
+    Returns the shared hash function for keys of the same type as key: str, int or a tuple of those.
+
+    :raises TypeError: for any other type of key.
+    :complexity: O(1), or O(len(key)) for a tuple.
+    """
+    if isinstance(key, str):
+        return STRING_HASHER
+    if isinstance(key, int):
+        return INT_HASHER
+    if isinstance(key, tuple):
+        item_hashers = tuple(hasher_for(item) for item in key)
+        if item_hashers not in TUPLE_HASHERS:
+            TUPLE_HASHERS[item_hashers] = TupleHasher(item_hashers, LinearProbeTable.HASH_BASE)
+        return TUPLE_HASHERS[item_hashers]
+    raise TypeError(f"No hash function for keys of type {type(key).__name__}")
+
+
+def select_hasher(key, table: LinearProbeTable) -> int:
+    """
+    Hash function of a table that has not hashed any key yet: picks the
+    hash function for the type of key and keeps it as the table's hasher.
+
+    :complexity: See hasher_for, plus the hash of key.
+    """
+    table.hasher = hasher_for(key)
+    return table.hasher(key, table)
+
+
 class LinearProbeTable(Generic[K, V]):
     """
     Linear Probe Table.
 
     Type Arguments:
-        - K:    Key Type. In most cases should be string.
-                Otherwise `hash` should be overwritten.
+        - K:    Key Type. A string, an int or a tuple of those.
+                Otherwise `hasher` should be given.
         - V:    Value Type.
 
+    Keys are hashed by `hasher`, a callable taking the key and the table,
+    which is usually shared between many tables. By default it is picked
+    from the type of the first key hashed (see hasher_for).
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
+    __slots__ = ("sizes", "size_index", "array", "count", "hasher")
+
+    # dump format: magic, kind, size index, table size, count, number of sizes (0
+    # for TABLE_SIZES), followed by the sizes and one (position, length, pickled
+    # pair) per pair
+    DUMP_MAGIC = b"LPT1"
+    DUMP_HEADER = struct.Struct("<4sIIIII")
+    DUMP_ENTRY = struct.Struct("<II")
+    DUMP_KIND = 0
+
     # No test case should exceed 1 million entries.
     TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
 
     HASH_BASE = 31
 
-    def __init__(self, sizes=None) -> None:
+    def __init__(self, sizes=None, hasher=None) -> None:
         """
         Initialise the Hash Table.
         """
-        if sizes is not None:
-            self.TABLE_SIZES = sizes
+        self.sizes = sizes if sizes is not None else self.TABLE_SIZES
+        self.hasher = hasher if hasher is not None else select_hasher
         self.size_index = 0
-        self.array:ArrayR[tuple[K, V]] = ArrayR(self.TABLE_SIZES[self.size_index])
+        self.array:ArrayR[tuple[K, V]] = ArrayR(self.sizes[self.size_index])
         self.count = 0
 
     def hash(self, key: K) -> int:
         """
         Hash a key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: O(hasher(key))
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return self.hasher(key, self)
 
     @property
     def table_size(self) -> int:
@@ -79,19 +186,22 @@ class LinearProbeTable(Generic[K, V]):
         """
         # Initial position
         position = self.hash(key)
+        array = self.array
+        size = len(array)
 
-        for _ in range(self.table_size):
-            if self.array[position] is None:
+        for _ in range(size):
+            item = array[position]
+            if item is None:
                 # Empty spot. Am I upserting or retrieving?
                 if is_insert:
                     return position
                 else:
                     raise KeyError(key)
-            elif self.array[position][0] == key:
+            elif item[0] == key:
                 return position
             else:
                 # Taken by something else. Time to linear probe.
-                position = (position + 1) % self.table_size
+                position = (position + 1) % size
 
         if is_insert:
             raise FullError("Table is full!")
@@ -201,15 +311,101 @@ class LinearProbeTable(Generic[K, V]):
         """
         old_array = self.array
         self.size_index += 1
-        if self.size_index == len(self.TABLE_SIZES):
+        if self.size_index == len(self.sizes):
             # Cannot be resized further.
             return
-        self.array = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
+        self.array = ArrayR(self.sizes[self.size_index])
         for item in old_array:
             if item is not None:
-                key, value = item
-                self[key] = value
+                # Keys are distinct, so each pair goes straight into the first free slot it probes
+                self.array[self._linear_probe(item[0], True)] = item
+        if len(self) > self.table_size / 2:
+            self._rehash()
+
+    def copy(self) -> LinearProbeTable[K, V]:
+        """
+        Returns a table with the same pairs at the same positions.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        table = LinearProbeTable(self.sizes, self.hasher)
+        table.size_index = self.size_index
+        table.array = ArrayR(len(self.array))
+        for position in range(len(self.array)):
+            table.array[position] = self.array[position]
+        table.count = self.count
+        return table
+
+    def _dump_layout(self, fp: BinaryIO) -> None:
+        """
+        Write everything about the table but its pairs: the header and sizes of the dump format.
+        """
+        sizes = self.sizes if self.sizes is not None and self.sizes is not self.TABLE_SIZES else []
+        fp.write(self.DUMP_HEADER.pack(self.DUMP_MAGIC, self.DUMP_KIND, self.size_index, len(self.array),
+                                       self.count, len(sizes)))
+        fp.write(struct.pack(f"<{len(sizes)}I", *sizes))
+
+    @staticmethod
+    def _load_layout(fp: BinaryIO, hasher=None) -> LinearProbeTable[K, V]:
+        """
+        Read what _dump_layout wrote, and return a table of that class, size and count with all positions empty.
+        :raises ValueError: when fp does not hold a dumped table.
+        """
+        header = LinearProbeTable.DUMP_HEADER
+        magic, kind, size_index, table_size, count, n_sizes = header.unpack(fp.read(header.size))
+        if magic != LinearProbeTable.DUMP_MAGIC:
+            raise ValueError("Not a dumped LinearProbeTable")
+        sizes = list(struct.unpack(f"<{n_sizes}I", fp.read(4 * n_sizes)))
+        table_type = InlineTable if kind == InlineTable.DUMP_KIND else LinearProbeTable
+        table = table_type(sizes or None, hasher)
+        table.size_index = size_index
+        table.array = [None] * table_size if table_type is InlineTable else ArrayR(table_size)
+        table.count = count
+        return table
+
+    def dump(self, fp: BinaryIO) -> None:
+        """
+        Write the table to a binary file, with the position of every pair and the current size, so that load
+        restores the same layout.
+
+        :complexity: O(N + pickle(pairs)) where N is self.table_size.
+        """
+        self._dump_layout(fp)
+        for position in range(len(self.array)):
+            item = self.array[position]
+            if item is not None:
+                data = pickle.dumps(item)
+                fp.write(self.DUMP_ENTRY.pack(position, len(data)))
+                fp.write(data)
+
+    @staticmethod
+    def load(fp: BinaryIO, hasher=None) -> LinearProbeTable[K, V]:
+        """
+        Read a table written by dump, of the same class it was dumped from, putting every pair back at its
+        position: no key is hashed.
+
+        :raises ValueError: when fp does not hold a dumped table.
+        :complexity: O(N + unpickle(pairs)) where N is the size of the table.
+        """
+        table = LinearProbeTable._load_layout(fp, hasher)
+        entry = LinearProbeTable.DUMP_ENTRY
+        for _ in range(table.count):
+            position, length = entry.unpack(fp.read(entry.size))
+            table.array[position] = pickle.loads(fp.read(length))
+        return table
+
+    def reserve(self, n: int) -> None:
+        """
+        Grow the table once, so that n more keys can be inserted without a rehash.
+
+        :complexity: See _rehash, when the table grows. O(S) otherwise, where S is len(self.sizes).
+        """
+        size_index = self.size_index
+        while size_index + 1 < len(self.sizes) and self.sizes[size_index] < 2 * (self.count + n):
+            size_index += 1
+        if size_index > self.size_index:
+            self.size_index = size_index - 1
+            self._rehash()
 
     def __str__(self) -> str:
         """
@@ -223,3 +419,102 @@ class LinearProbeTable(Generic[K, V]):
                 (key, value) = item
                 result += "(" + str(key) + "," + str(value) + ")\n"
         return result
+
+
+
+class InlineTable(LinearProbeTable[K, V]):
+    """
+    Linear Probe Table for a handful of keys.
+
+    The (key, value) pairs are kept in a plain list that grows by one slot at a
+    time and is scanned in order, so a table holding a single pair only takes
+    a list of one slot. `promote` turns it into a LinearProbeTable once it
+    holds too many keys for a scan to be cheap.
+
+    The constructor takes the same arguments as LinearProbeTable, which are
+    passed on by `promote`.
+    """
+
+    __slots__ = ()
+
+    DUMP_KIND = 1
+
+    def __init__(self, sizes=None, hasher=None) -> None:
+        """
+        Initialise the table, without allocating any slot.
+        """
+        self.sizes = sizes
+        self.hasher = hasher
+        self.size_index = 0
+        self.array: list[tuple[K, V]] = []
+        self.count = 0
+
+    def _linear_probe(self, key: K, is_insert: bool) -> int:
+        """
+        Find the position of the key by scanning every slot, adding a slot at the end when inserting a new key.
+        :complexity: O(N*comp(K)) where N is len(self)
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        """
+        for position, item in enumerate(self.array):
+            if item[0] == key:
+                return position
+        if not is_insert:
+            raise KeyError(key)
+        self.array.append(None)
+        return len(self.array) - 1
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        :complexity: See linear probe.
+        """
+        position = self._linear_probe(key, True)
+        if self.array[position] is None:
+            self.count += 1
+        self.array[position] = (key, data)
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair by moving the last pair into its slot.
+
+        :complexity: See linear probe.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._linear_probe(key, False)
+        self.array[position] = self.array[-1]
+        self.array.pop()
+        self.count -= 1
+
+    def _rehash(self) -> None:
+        """
+        The list grows with every new key, so there is nothing to resize.
+        """
+
+    def copy(self) -> InlineTable[K, V]:
+        """
+        Returns a table with the same pairs at the same positions.
+
+        :complexity: O(N) where N is len(self).
+        """
+        table = InlineTable(self.sizes, self.hasher)
+        table.array = self.array.copy()
+        table.count = self.count
+        return table
+
+    def promote(self) -> LinearProbeTable[K, V]:
+        """
+        Returns a LinearProbeTable holding the same pairs.
+
+        :complexity: O(N*hash(K)) where N is len(self), with no probing.
+        """
+        table = LinearProbeTable(self.sizes, self.hasher)
+        for key, value in self.array:
+            table[key] = value
+        return table
+
+
+STRING_HASHER = StringHasher(LinearProbeTable.HASH_BASE)
+INT_HASHER = IntHasher()
+# Tuple hash functions by the hash functions of their items
+TUPLE_HASHERS = {}
@@ -0,0 +1,50 @@
+""" Sparse array of references
+
+Drop-in replacement for ArrayR when most positions stay None: only the
+positions holding a value take up memory.
+"""
+__docformat__ = 'reStructuredText'
+
+from typing import TypeVar, Generic
+
+T = TypeVar('T')
+
+
+class SparseArray(Generic[T]):
+
+    __slots__ = ("length", "items")
+
+    def __init__(self, length: int) -> None:
+        """ Creates an array of references to objects of the given length,
+        all set to None.
+        :complexity: O(1)
+        :pre: length > 0
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        self.length = length
+        self.items = {}
+
+    def __len__(self) -> int:
+        """ Returns the length of the array
+        :complexity: O(1)
+        """
+        return self.length
+
+    def __getitem__(self, index: int) -> T:
+        """ Returns the object in position index (None if never set).
+        :complexity: O(1)
+        :pre: index in between 0 and length
+        """
+        return self.items.get(index)
+
+    def __setitem__(self, index: int, value: T) -> None:
+        """ Sets the object in position index to value. Setting None frees
+        the position.
+        :complexity: O(1)
+        :pre: index in between 0 and length
+        """
+        if value is None:
+            self.items.pop(index, None)
+        else:
+            self.items[index] = value
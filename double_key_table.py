@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar, Iterator
-from data_structures.hash_table import LinearProbeTable, FullError
+import mmap
+import pickle
+import struct
+import threading
+from typing import BinaryIO, Generic, TypeVar, Iterable, Iterator
+from data_structures.hash_table import LinearProbeTable, InlineTable, FullError, hasher_for
 from data_structures.referential_array import ArrayR
 
 K1 = TypeVar('K1')
@@ -14,12 +18,19 @@ class DoubleKeyTable(Generic[K1, K2, V]):
     Double Hash Table.
 
     Type Arguments:
-        - K1:   1st Key Type. In most cases should be string.
+        - K1:   1st Key Type. A string, an int or a tuple of those.
                 Otherwise `hash1` should be overwritten.
-        - K2:   2nd Key Type. In most cases should be string.
+        - K2:   2nd Key Type. A string, an int or a tuple of those.
                 Otherwise `hash2` should be overwritten.
         - V:    Value Type.
 
+    The hash functions for the key types are picked once, from the first key of each table.
+
+    The outer table holds a [key1, inner table] list per top-level key. snapshot() shares the tables with a
+    read-only DoubleKeyTableSnapshot and starts a new epoch. The first write of the epoch copies the outer table,
+    turning its lists into (key1, inner table) tuples to mark inner tables that are shared, and the first write to
+    such an inner table copies it.
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
@@ -29,74 +40,186 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
     HASH_BASE = 31
 
-    def __init__(self, sizes: list | None = None, internal_sizes: list | None = None) -> None:
+    # Most top-level keys only have a few bottom-level keys: up to this many are kept in an InlineTable.
+    INLINE_LIMIT = 4
+
+    # dump format: magic, length of the pickled settings, followed by the settings, the header of the outer table
+    # (see LinearProbeTable.dump), one (position, length, pickled key1, dumped inner table) per top-level key and
+    # the dumped reverse index, if any
+    DUMP_MAGIC = b"DKT1"
+    DUMP_HEADER = struct.Struct("<4sI")
+
+    def __init__(self, sizes: list | None = None, internal_sizes: list | None = None,
+                 inline_limit: int | None = None, reverse_index: bool = False) -> None:
         """
         check if sizes and internal sizes are none
         if they are none, then use the default list for both internal and outer
+        inline_limit is the number of bottom-level keys an inner table holds before it becomes a LinearProbeTable.
+        0 always uses LinearProbeTables; it defaults to INLINE_LIMIT, unless internal_sizes is given or hash2 is
+        replaced, as the positions of the bottom-level keys are then expected to follow hash2.
+        reverse_index keeps a second table of every (key2, key1) pair, for keys_for_second. It roughly doubles the
+        memory used, so it is off by default.
         :complexity: O(1) as we are initialising variables
         """
         self.table = None
         self.internal_sizes = internal_sizes
         self.sizes = sizes
+        self.inline_limit = inline_limit
+        # The top-level keys of every bottom-level key, hashed with the default hash functions
+        self.reverse = DoubleKeyTable() if reverse_index else None
+        # Hash functions shared by the outer table and by every inner table
+        self.outer_hasher = None
+        self.inner_hasher = None
+        # The outer table being hashed by the outer hash function in each thread, see _hash_outer
+        self.hashing = threading.local()
+        # Total number of (key1, key2) pairs stored
+        self.total_count = 0
+        # Tables from an earlier epoch may be shared with snapshots, and are copied before being changed
+        self.epoch = 0
+        self.table_epoch = 0
 
 
     def hash1(self, key: K1) -> int:
         """
         Hash the 1st key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: O(len(key)) for a string, O(1) for an int.
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return hasher_for(key)(key, self._hashing_table())
 
     def hash2(self, key: K2, sub_table: LinearProbeTable[K2, V]) -> int:
         """
         Hash the 2nd key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: O(len(key)) for a string, O(1) for an int.
         """
+        return hasher_for(key)(key, sub_table)
 
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % sub_table.table_size
-            a = a * self.HASH_BASE % (sub_table.table_size - 1)
-        return value
+    def _overrides(self, name: str) -> bool:
+        """
+        Whether the hash method `name` was replaced on this table or in a subclass.
+        :complexity: O(1)
+        """
+        return name in vars(self) or getattr(type(self), name) is not getattr(DoubleKeyTable, name)
 
-    def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
+    def _hashing_table(self) -> LinearProbeTable[K1, LinearProbeTable[K2, V]]:
         """
-        Find the correct position for this key in the hash table using linear probing.
+        The outer table being hashed in this thread, which may be the outer table of a snapshot, or else this
+        table's own outer table.
+        :complexity: O(1)
+        """
+        table = getattr(self.hashing, "table", None)
+        return self.table if table is None else table
 
-        :raises KeyError: When the key pair is not in the table, but is_insert is False.
-        :raises FullError: When a table is full and cannot be inserted.
+    def _hash_outer(self, key: K1, table: LinearProbeTable) -> int:
+        """
+        The outer hash function when hash1 is replaced: hash1 only takes the key, so while it runs table_size is
+        the size of the table hashed rather than of this table's outer table, which differs for snapshots.
+        :complexity: See hash1.
+        """
+        previous = getattr(self.hashing, "table", None)
+        self.hashing.table = table
+        try:
+            return self.hash1(key)
+        finally:
+            self.hashing.table = previous
 
-        :complexity: O(n*m*comp) when we search through the entire outside and inside table,
-         where n and m are the sizes of the outer and inner tables respectively.
+    def _create_table(self) -> None:
         """
-        if self.table is None:
-            self.table = LinearProbeTable(self.sizes)
-            self.table.hash = lambda k: self.hash1(k)
+        Create the outer table, choosing the hash functions once for the outer and all inner tables.
+        When hash1 and hash2 are the defaults, each table picks the shared hash function for the type of its first
+        key; otherwise a single function per DoubleKeyTable forwards to the replaced method.
+        :complexity: O(1)
+        """
+        if self._overrides("hash1"):
+            self.outer_hasher = self._hash_outer
+        if self._overrides("hash2"):
+            self.inner_hasher = lambda key, table: self.hash2(key, table)
+        if self.inline_limit is None:
+            inline = self.internal_sizes is None and self.inner_hasher is None
+            self.inline_limit = self.INLINE_LIMIT if inline else 0
+        self.table = LinearProbeTable(self.sizes, self.outer_hasher)
+        self.table_epoch = self.epoch
+
+    def _sub_table(self, key1: K1, is_insert: bool, n: int = 1) -> tuple[int, LinearProbeTable[K2, V]]:
+        """
+        Find the position of key1 in the outer table and its inner table, creating an empty inner table for a new
+        key1 when inserting. The inner table is made to fit n bottom-level keys without a rehash.
 
+        :raises KeyError: When key1 is not in the table, but is_insert is False.
+        :raises FullError: When the outer table is full and cannot be inserted.
+        :complexity: See LinearProbeTable._linear_probe, plus LinearProbeTable.reserve when n > 1.
+        """
+        if self.table is None:
+            self._create_table()
+        elif is_insert:
+            self._own_table()
 
         outer_pos = self.table._linear_probe(key1, is_insert)
         sub_data = self.table.array[outer_pos]
 
         if sub_data is None:
-            if is_insert:
-                self.table.array[outer_pos] = [key1, LinearProbeTable(self.internal_sizes)]
-                sub_table = self.table.array[outer_pos][1]
-                sub_table.hash = lambda k: self.hash2(k, sub_table)
-                inner_pos = sub_table._linear_probe(key2, is_insert)
-            else:
+            if not is_insert:
                 raise KeyError(key1)
-        else:
-            sub_table = self.table.array[outer_pos][1]
-            inner_pos = sub_table._linear_probe(key2, is_insert)
+            if n <= self.inline_limit:
+                sub_table = InlineTable(self.internal_sizes, self.inner_hasher)
+            else:
+                sub_table = LinearProbeTable(self.internal_sizes, self.inner_hasher)
+            sub_data = self.table.array[outer_pos] = [key1, sub_table]
+        elif is_insert:
+            sub_data = self._own_sub_table(outer_pos)
+            sub_table = sub_data[1]
+            if n > 1 and isinstance(sub_table, InlineTable) and len(sub_table) + n > self.inline_limit:
+                sub_data[1] = sub_table.promote()
+        if n > 1 and not isinstance(sub_data[1], InlineTable):
+            sub_data[1].reserve(n)
+        return outer_pos, sub_data[1]
+
+    def _own_table(self) -> None:
+        """
+        Copy the outer table if it was created in an earlier epoch. Its entries become (key1, inner table) tuples, as
+        the inner tables are still shared.
+        :complexity: O(n) when copying, where n is the size of the outer table. O(1) otherwise.
+        """
+        if self.table_epoch != self.epoch:
+            self.table = self.table.copy()
+            for position, entry in enumerate(self.table.array):
+                if entry is not None:
+                    self.table.array[position] = (entry[0], entry[1])
+            self.table_epoch = self.epoch
+
+    def _own_sub_table(self, outer_pos: int) -> list:
+        """
+        Copy the inner table at outer_pos of the outer table, which must be owned, if it is shared, and return the
+        [key1, inner table] list holding it.
+        :complexity: O(m) when copying, where m is the size of the inner table. O(1) otherwise.
+        """
+        entry = self.table.array[outer_pos]
+        if isinstance(entry, tuple):
+            entry = self.table.array[outer_pos] = [entry[0], entry[1].copy()]
+        return entry
+
+    def snapshot(self) -> DoubleKeyTableSnapshot[K1, K2, V]:
+        """
+        Returns a read-only view of the table as it is now, which later changes to this table do not affect.
+        :complexity: O(1). The next changes to this table copy the tables they touch, see _own_table.
+        """
+        snapshot = DoubleKeyTableSnapshot(self)
+        self.epoch += 1
+        return snapshot
+
+    def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
+        """
+        Find the correct position for this key in the hash table using linear probing.
+
+        :raises KeyError: When the key pair is not in the table, but is_insert is False.
+        :raises FullError: When a table is full and cannot be inserted.
+
+        :complexity: O(n*m*comp) when we search through the entire outside and inside table,
+         where n and m are the sizes of the outer and inner tables respectively.
+        """
+        outer_pos, sub_table = self._sub_table(key1, is_insert)
+        inner_pos = sub_table._linear_probe(key2, is_insert)
         return (outer_pos, inner_pos)
 
     def iter_keys(self, key: K1 | None = None) -> Iterator[K1 | K2]:
@@ -115,20 +238,7 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         :complexity: O(n*m*comp) when key is not None, and we search through the entire outer table and the entire inner
         table.
         """
-        result = []
-        if key is None:
-            for i in range(self.table.table_size):
-                if self.table.array[i] is not None:
-                    if self.table.array[i][0] is not None:
-                        result.append(self.table.array[i][0])
-            return result
-        position = self.table._linear_probe(key, False)
-        sub_table = self.table.array[position][1]
-        for i in range(sub_table.table_size):
-            if sub_table.array[i] is not None:
-                if sub_table.array[i][0] is not None:
-                    result.append(sub_table.array[i][0])
-        return result
+        return list(self.iter_keys(key))
 
     def iter_values(self, key: K1 | None = None) -> Iterator[V]:
         """
@@ -146,23 +256,16 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         :complexity: O(n*m*comp) when key is not None, and we search through the entire outer table and the entire inner
         table.
         """
-        result = []
-        if key is None:
-            for i in range(self.table.table_size):
-                if self.table.array[i] is not None:
-                    if self.table.array[i][1] is not None:
-                        sub_table = self.table.array[i][1]
-                        for j in range(sub_table.table_size):
-                            if sub_table.array[j] is not None:
-                                result.append(sub_table.array[j][1])
-            return result
-        position = self.table._linear_probe(key, False)
-        sub_table = self.table.array[position][1]
-        for i in range(sub_table.table_size):
-            if sub_table.array[i] is not None:
-                if sub_table.array[i][0] is not None:
-                    result.append(sub_table.array[i][1])
-        return result
+        return list(self.iter_values(key))
+
+    def iter_items(self, key: K1 | None = None) -> Iterator[tuple[K1, K2, V]]:
+        """
+        key = None:
+            Returns an iterator of all (key1, key2, value) triples in hash table
+        key = k:
+            Returns an iterator of the (k, key2, value) triples in the bottom-hash-table for k.
+        """
+        return DoubleKeyTableIterItems(self, key)
 
     def __contains__(self, key: tuple[K1, K2]) -> bool:
         """
@@ -190,26 +293,92 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
     def __setitem__(self, key: tuple[K1, K2], data: V) -> None:
         """
-        Set an (key, value) pair in our hash table.
+        Set an (key, value) pair in our hash table, replacing the value of an existing pair.
         """
         positions = self._linear_probe(key[0], key[1], True)
         pos1 = positions[0]
         pos2 = positions[1]
+        sub_table = self.table.array[pos1][1]
 
-        if self.table.array[pos1][1].is_empty():
-            self.table.array[pos1][0] = key[0]
+        if sub_table.is_empty():
+            # New top-level key, created by _linear_probe
             self.table.count += 1
 
-        if self.table.array[pos1][1].array[pos2] is None:
-            self.table.array[pos1][1].array[pos2] = (key[1], data)
-            self.table.array[pos1][1].count += 1
-
-        sub_table = self.table.array[pos1][1]
-        if len(sub_table) > sub_table.table_size/ 2:
+        if sub_table.array[pos2] is None:
+            sub_table.count += 1
+            self.total_count += 1
+            if self.reverse is not None:
+                self.reverse[key[1], key[0]] = None
+        sub_table.array[pos2] = (key[1], data)
+
+        if isinstance(sub_table, InlineTable):
+            if len(sub_table) > self.inline_limit:
+                self.table.array[pos1][1] = sub_table.promote()
+        elif len(sub_table) > sub_table.table_size / 2:
             sub_table._rehash()
 
         if len(self.table) > self.table_size / 2:
-            self.table._rehash()
+            self._rehash()
+
+    @staticmethod
+    def _group(pairs: Iterable[tuple]) -> dict:
+        """
+        Group pairs by their first item, keeping (index in pairs, pair) for each, in order.
+        :complexity: O(N) where N is the number of pairs.
+        """
+        groups = {}
+        for index, pair in enumerate(pairs):
+            groups.setdefault(pair[0], []).append((index, pair))
+        return groups
+
+    def get_many(self, keys: Iterable[tuple[K1, K2]]) -> list[V]:
+        """
+        Get the values of many (key1, key2) pairs, in the order of keys.
+        The outer table is probed once for each distinct key1.
+
+        :raises KeyError: when one of the keys doesn't exist.
+        :complexity: O(N + K*outer + N*inner) where N is the number of keys, K the number of distinct key1 and outer,
+        inner the costs of a probe of the outer and inner tables (see LinearProbeTable._linear_probe).
+        """
+        groups = self._group(keys)
+        result = [None] * sum(len(group) for group in groups.values())
+        for key1, group in groups.items():
+            _, sub_table = self._sub_table(key1, False)
+            for index, key in group:
+                result[index] = sub_table.array[sub_table._linear_probe(key[1], False)][1]
+        return result
+
+    def set_many(self, items: Iterable[tuple[K1, K2, V]]) -> None:
+        """
+        Set many (key1, key2, value) triples, as iter_items returns them, replacing the values of existing pairs.
+        The outer table is probed once for each distinct key1, and its inner table is grown once to fit all its
+        new keys.
+
+        :raises FullError: when a table cannot be resized further.
+        :complexity: As get_many, plus the rehashes of the tables that grow.
+        """
+        new_pairs = []
+        for key1, group in self._group(items).items():
+            outer_pos, sub_table = self._sub_table(key1, True, len(group))
+            if sub_table.is_empty():
+                self.table.count += 1
+            for _, (_, key2, data) in group:
+                inner_pos = sub_table._linear_probe(key2, True)
+                if sub_table.array[inner_pos] is None:
+                    sub_table.count += 1
+                    self.total_count += 1
+                    new_pairs.append((key2, key1, None))
+                sub_table.array[inner_pos] = (key2, data)
+            if isinstance(sub_table, InlineTable):
+                if len(sub_table) > self.inline_limit:
+                    self.table.array[outer_pos][1] = sub_table.promote()
+            elif len(sub_table) > sub_table.table_size / 2:
+                # The inner table was only reserved for groups of more than one pair
+                sub_table._rehash()
+            if len(self.table) > self.table_size / 2:
+                self._rehash()
+        if self.reverse is not None:
+            self.reverse.set_many(new_pairs)
 
     def __delitem__(self, key: tuple[K1, K2]) -> None:
         """
@@ -220,111 +389,282 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         # First delete the item in the inner hash table and shuffle cluster back
         positions = self._linear_probe(key[0], key[1], False)
         pos1 = positions[0]
-        pos2 = positions[1]
-        sub_table = self.table.array[pos1][1]
+        self._own_table()
+        sub_table = self._own_sub_table(pos1)[1]
         del sub_table[key[1]]
+        self.total_count -= 1
+        if self.reverse is not None:
+            del self.reverse[key[1], key[0]]
 
         # If inner hash table is empty, delete outer key
         if sub_table.is_empty():
             del self.table[key[0]]
 
+    def keys_for_second(self, key: K2) -> list[K1]:
+        """
+        Returns all top-level keys that have the bottom-level key `key` (no particular order).
+        :complexity: O(R + probe) with the reverse index, where R is the number of keys returned and probe the
+        cost of one probe of the reverse index. Without it, every inner table is probed: O(K*probe) where K is the
+        number of top-level keys.
+        """
+        if self.reverse is not None:
+            try:
+                return self.reverse.keys(key)
+            except KeyError:
+                return []
+        result = []
+        for key1 in self.iter_keys():
+            if (key1, key) in self:
+                result.append(key1)
+        return result
+
     def _rehash(self) -> None:
         """
         Need to resize table and reinsert all values
 
         :complexity best: O(N*hash(K)) No probing.
         :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
-        Where N is len(self)
-        """
-        raise NotImplementedError()
+        Where N is the number of top-level keys. Inner tables are moved as they are, so their entries are not
+        rehashed.
+        """
+        old_array = self.table.array
+        if self.table.size_index + 1 == len(self.table.sizes):
+            # Cannot be resized further.
+            return
+        self.table.size_index += 1
+        self.table.array = ArrayR(self.table.sizes[self.table.size_index])
+        for entry in old_array:
+            if entry is not None:
+                position = self.table._linear_probe(entry[0], True)
+                self.table.array[position] = entry
+
+    def dump(self, fp: BinaryIO) -> None:
+        """
+        Write the table to a binary file, keeping the position of every key and the size of every table, so that
+        load restores the same layout without hashing any key.
+        :complexity: O(n + M + pickle(keys and values)) where n is the size of the outer table and M the sum of
+        the sizes of the inner tables.
+        """
+        settings = pickle.dumps((self.sizes, self.internal_sizes, self.inline_limit, self.total_count,
+                                 self.table is not None, self.reverse is not None))
+        fp.write(self.DUMP_HEADER.pack(self.DUMP_MAGIC, len(settings)))
+        fp.write(settings)
+        if self.table is not None:
+            self.table._dump_layout(fp)
+            for position in range(self.table_size):
+                entry = self.table.array[position]
+                if entry is not None:
+                    key = pickle.dumps(entry[0])
+                    fp.write(LinearProbeTable.DUMP_ENTRY.pack(position, len(key)))
+                    fp.write(key)
+                    entry[1].dump(fp)
+        if self.reverse is not None:
+            self.reverse.dump(fp)
+
+    @classmethod
+    def load(cls, fp: BinaryIO) -> DoubleKeyTable[K1, K2, V]:
+        """
+        Read a table written by dump, putting every key back at its position.
+        Replacements of hash1 or hash2 on the dumped object are not kept, only those made in a subclass.
+        :raises ValueError: when fp does not hold a dumped table.
+        :complexity: O(n + M + unpickle(keys and values)), see dump.
+        """
+        magic, length = cls.DUMP_HEADER.unpack(fp.read(cls.DUMP_HEADER.size))
+        if magic != cls.DUMP_MAGIC:
+            raise ValueError("Not a dumped DoubleKeyTable")
+        sizes, internal_sizes, inline_limit, total_count, has_table, has_reverse = pickle.loads(fp.read(length))
+        table = cls(sizes, internal_sizes, inline_limit)
+        table.total_count = total_count
+        if has_table:
+            table._create_table()
+            outer = LinearProbeTable._load_layout(fp, table.outer_hasher)
+            for _ in range(outer.count):
+                position, length = LinearProbeTable.DUMP_ENTRY.unpack(fp.read(LinearProbeTable.DUMP_ENTRY.size))
+                key = pickle.loads(fp.read(length))
+                outer.array[position] = [key, LinearProbeTable.load(fp, table.inner_hasher)]
+            table.table = outer
+        if has_reverse:
+            table.reverse = DoubleKeyTable.load(fp)
+        return table
+
+    @classmethod
+    def open(cls, path: str) -> DoubleKeyTableSnapshot[K1, K2, V]:
+        """
+        Load a table dumped to the file at path by reading it through a read-only memory map, and return it as a
+        read-only snapshot.
+        :raises ValueError: when the file does not hold a dumped table.
+        :complexity: See load.
+        """
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return cls.load(buffer).snapshot()
 
     @property
     def table_size(self) -> int:
         """
-        Return the current size of the table (different from the length)
+        Return the current size of the table (different from the length), or while hash1 hashes for a snapshot,
+        the size of the snapshot's table
         """
-        return len(self.table.array)
+        return len(self._hashing_table().array)
 
     def __len__(self) -> int:
         """
         Returns number of elements in the hash table
+        :complexity: O(1)
         """
-        raise NotImplementedError()
+        return self.total_count
 
-    def __str__(self) -> str:
+    def count(self, key: K1) -> int:
+        """
+        Returns the number of bottom-level keys stored for top-level key.
+        :raises KeyError: when the key doesn't exist.
+        :complexity: See LinearProbeTable._linear_probe.
         """
-        String representation.
+        if self.table is None:
+            raise KeyError(key)
+        position = self.table._linear_probe(key, False)
+        return len(self.table.array[position][1])
 
-        Not required but may be a good testing tool.
+    def __str__(self) -> str:
         """
-        raise NotImplementedError()
+        Returns all the (key1, key2, value) triples in our hash table (no particular order).
+        :complexity: O(N * (str(key1) + str(key2) + str(value))) where N is the sum of the table sizes
+        """
+        result = ""
+        for key1, key2, value in self.iter_items():
+            result += "(" + str(key1) + "," + str(key2) + "," + str(value) + ")\n"
+        return result
 
 
-class DoubleKeyTableIterKeys:
+class DoubleKeyTableSnapshot(DoubleKeyTable[K1, K2, V]):
     """
-    Iterable class for DoubleKeyTable. Returns all the keys in the object.
+    Read-only view of a DoubleKeyTable, returned by DoubleKeyTable.snapshot.
+
+    It shares the tables of the DoubleKeyTable it was taken from, which copies them before changing them, so the
+    view stays the same while that table changes and can be read from other threads without locking.
     """
 
-    def __init__(self, double_key_table: DoubleKeyTable, key: K1 | None = None):
+    def __init__(self, double_key_table: DoubleKeyTable[K1, K2, V]) -> None:
         """
-        Initialises the iteration. Will return the upper level keys if key is None, otherwise it will return the lower
-        level key for that specified key.
-        :complexity: O(1)
+        Share the tables of double_key_table.
+        :complexity: O(1), or O(1) per nested reverse index.
         """
-        self.count = 0
-        self.all_keys = double_key_table.keys(key)
-        self.max_count = len(self.all_keys)
+        self.__dict__.update(vars(double_key_table))
+        if double_key_table.reverse is not None:
+            self.reverse = double_key_table.reverse.snapshot()
 
-    def __iter__(self) -> DoubleKeyTableIterKeys:
+    def _read_only(self, *args) -> None:
+        """
+        :raises TypeError: always, snapshots cannot be changed.
+        """
+        raise TypeError("DoubleKeyTable snapshots are read-only")
+
+    __setitem__ = __delitem__ = set_many = _read_only
+
+    def snapshot(self) -> DoubleKeyTableSnapshot[K1, K2, V]:
+        """
+        A snapshot does not change, so it is its own snapshot.
+        """
         return self
 
-    def __next__(self) -> V:
+    def _sub_table(self, key1: K1, is_insert: bool, n: int = 1) -> tuple[int, LinearProbeTable[K2, V]]:
         """
-        Returns the next value of the iteration.
-        :raises StopIteration: when all valid keys have been returned.
-        :complexity: O(comp)
-        """
-        found = False
-        while not found:
-            if self.count < self.max_count:
-                self.count += 1
-                return self.all_keys[self.count]
-                found = True
-            else:
-                found = True
-        raise StopIteration
+        See DoubleKeyTable._sub_table, without creating the outer table of an empty snapshot.
+        """
+        if self.table is None:
+            raise KeyError(key1)
+        return super()._sub_table(key1, is_insert, n)
 
 
-class DoubleKeyTableIterValues:
+class DoubleKeyTableIterItems:
     """
-    Iterable class for DoubleKeyTable. Returns all the values in the object.
+    Iterable class for DoubleKeyTable. Returns all the (key1, key2, value) triples in the object.
+
+    The outer and inner tables are walked with a cursor each, so nothing is copied and changes to the table made
+    during the iteration show up in the following values.
     """
+
     def __init__(self, double_key_table: DoubleKeyTable, key: K1 | None = None):
         """
-        Initialises the iteration. Will return all values if key is None, otherwise it will return the values for that
-        specified key.
-        :complexity: O(1)
+        Initialises the iteration. Will walk every inner table if key is None, otherwise only the inner table of
+        that specified key.
+        :raises KeyError: when key is not in the table.
+        :complexity: O(1) if key is None, otherwise see LinearProbeTable._linear_probe.
+        """
+        self.double_key_table = double_key_table
+        self.key = key
+        self.outer_index = 0
+        self.inner_index = 0
+        self.top_key = None
+        self.sub_table = None
+        if key is not None:
+            if double_key_table.table is None:
+                raise KeyError(key)
+            position = double_key_table.table._linear_probe(key, False)
+            self.top_key, self.sub_table = double_key_table.table.array[position]
+
+    def __iter__(self) -> DoubleKeyTableIterItems:
+        return self
+
+    def _next_outer(self) -> tuple[K1, LinearProbeTable[K2, V]]:
         """
-        self.count = 0
-        self.all_values = double_key_table.values(key)
-        self.max_count = len(self.all_values)
+        Moves the outer cursor to the next top-level entry and returns it.
+        :raises StopIteration: when all top-level entries have been returned.
+        :complexity: O(n) where n is the size of the outer table.
+        """
+        outer = self.double_key_table.table
+        if outer is not None:
+            while self.outer_index < outer.table_size:
+                entry = outer.array[self.outer_index]
+                self.outer_index += 1
+                if entry is not None:
+                    return entry
+        raise StopIteration
 
+    def __next__(self) -> tuple[K1, K2, V]:
+        """
+        Returns the next (key1, key2, value) triple of the iteration.
+        :raises StopIteration: when all triples have been returned.
+        :complexity: O(n + m) where n and m are the sizes of the outer and inner tables.
+        """
+        while True:
+            if self.sub_table is not None:
+                while self.inner_index < self.sub_table.table_size:
+                    item = self.sub_table.array[self.inner_index]
+                    self.inner_index += 1
+                    if item is not None:
+                        return self.top_key, item[0], item[1]
+            if self.key is not None:
+                raise StopIteration
+            self.top_key, self.sub_table = self._next_outer()
+            self.inner_index = 0
 
-    def __iter__(self) -> DoubleKeyTableIterValues:
-        return self
+
+class DoubleKeyTableIterKeys(DoubleKeyTableIterItems):
+    """
+    Iterable class for DoubleKeyTable. Returns all the keys in the object.
+    """
+
+    def __next__(self) -> K1 | K2:
+        """
+        Returns the next key of the iteration: the next top-level key if key is None, otherwise the next
+        bottom-level key for that specified key.
+        :raises StopIteration: when all valid keys have been returned.
+        :complexity: See DoubleKeyTableIterItems.__next__.
+        """
+        if self.key is None:
+            return self._next_outer()[0]
+        return super().__next__()[1]
+
+
+class DoubleKeyTableIterValues(DoubleKeyTableIterItems):
+    """
+    Iterable class for DoubleKeyTable. Returns all the values in the object.
+    """
 
     def __next__(self) -> V:
         """
         Returns the next value of the iteration.
         :raises StopIteration: when all valid values have been returned.
-        :complexity: O(comp)
-        """
-        found = False
-        while not found:
-            if self.count < self.max_count:
-                self.count += 1
-                return self.all_values[self.count]
-                found = True
-            else:
-                found = True
-        raise StopIteration
+        :complexity: See DoubleKeyTableIterItems.__next__.
+        """
+        return super().__next__()[2]
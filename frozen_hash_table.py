@@ -0,0 +1,279 @@
+""" Frozen Infinite Hash Table
+
+Read-only, memory-mapped form of an InfiniteHashTable.
+
+The file holds, in order (all integers little-endian, 4 bytes wide):
+    - a header (see HEADER), followed by the characters of a mapped
+      alphabet, padded to 4 bytes,
+    - the parent table: TABLE_SIZE slots,
+    - one record per sub-table: skip start, skip length, TABLE_SIZE slots,
+    - one record per key: key start, key length, value start, value length,
+    - the skipped positions of path-compressed sub-tables,
+    - the keys (UTF-8 encoded unless they are bytes), followed by the
+      pickled values.
+
+A slot is 0 when empty, k > 0 for the (k-1)th key record and k < 0 for the
+(-k-1)th sub-table record. Every lookup reads the mapped file directly, so
+opening a table is O(1) and processes opening the same file share its pages.
+"""
+from __future__ import annotations
+
+import mmap
+import pickle
+import struct
+from typing import Generic, TypeVar
+
+from infinite_hash_table import ByteAlphabet, InfiniteHashTable, MappedAlphabet
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class FrozenInfiniteHashTable(Generic[K, V]):
+    """
+    Read-only Infinite Hash Table backed by a memory-mapped file.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    MAGIC = b"IHT2"
+    # magic, table size, compressed, alphabet kind, alphabet bytes, count,
+    # sub-tables, keys, skipped positions, key bytes, value bytes
+    HEADER = struct.Struct("<4sIIIIIIIIII")
+    # Alphabet kinds
+    DEFAULT_ALPHABET = 0
+    BYTE_ALPHABET = 1
+    MAPPED_ALPHABET = 2
+    SLOT = struct.Struct("<i")
+    BRANCH = struct.Struct("<II")
+    LEAF = struct.Struct("<IIII")
+    POSITION = struct.Struct("<I")
+
+    # Positions are computed exactly as in the table that was frozen
+    hash = InfiniteHashTable.hash
+
+    def __init__(self, buffer: mmap.mmap | bytes) -> None:
+        """
+        Read the header of a frozen table and locate each of its sections.
+
+        Args: the mapped (or in-memory) contents of a frozen table
+        Raises: ValueError: when the buffer does not hold a frozen table
+        """
+        magic, table_size, compress, alphabet, alphabet_bytes, count, n_branches, n_leaves, n_skip, key_bytes, _ = \
+            self.HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC:
+            raise ValueError("Not a frozen InfiniteHashTable")
+        self.buffer = buffer
+        self.TABLE_SIZE = table_size
+        self.compress = bool(compress)
+        self.count = count
+        self.level = 0
+        if alphabet == self.BYTE_ALPHABET:
+            self.alphabet = ByteAlphabet()
+        elif alphabet == self.MAPPED_ALPHABET:
+            chars = bytes(buffer[self.HEADER.size:self.HEADER.size + alphabet_bytes])
+            self.alphabet = MappedAlphabet(chars.decode())
+        else:
+            self.alphabet = None
+        self.table_offset = self.HEADER.size + self.padded(alphabet_bytes)
+        self.branch_offset = self.table_offset + table_size * self.SLOT.size
+        self.branch_size = self.BRANCH.size + table_size * self.SLOT.size
+        self.leaf_offset = self.branch_offset + n_branches * self.branch_size
+        self.skip_offset = self.leaf_offset + n_leaves * self.LEAF.size
+        self.key_offset = self.skip_offset + n_skip * self.POSITION.size
+        self.value_offset = self.key_offset + key_bytes
+
+    @staticmethod
+    def padded(length: int) -> int:
+        """
+        Round a length of bytes up to a multiple of 4.
+        """
+        return (length + 3) // 4 * 4
+
+    @classmethod
+    def freeze(cls, table: InfiniteHashTable[K, V], path: str) -> None:
+        """
+        Write an InfiniteHashTable to a file in the frozen format.
+
+        Args: the table to freeze, and the path of the file to write
+        Raises: ValueError: when the table uses an alphabet other than
+            ByteAlphabet or MappedAlphabet
+        Returns: None
+        Complexity: Best case = Worst case = O(T*table.TABLE_SIZE + N*(len(key) + pickle(value))),
+            where T is the number of (sub-)tables and N the number of keys
+        """
+        if table.alphabet is None:
+            alphabet, chars = cls.DEFAULT_ALPHABET, b""
+        elif isinstance(table.alphabet, ByteAlphabet):
+            alphabet, chars = cls.BYTE_ALPHABET, b""
+        elif isinstance(table.alphabet, MappedAlphabet):
+            alphabet, chars = cls.MAPPED_ALPHABET, table.alphabet.chars.encode()
+        else:
+            raise ValueError(f"Cannot freeze alphabet {table.alphabet!r}")
+        branches = []
+        leaves = []
+
+        def slots(sub_table) -> list[int]:
+            # Number every node in the order it is first reached
+            result = []
+            for pos in range(table.TABLE_SIZE):
+                node = sub_table[pos]
+                if node is None:
+                    result.append(0)
+                elif node.is_leaf:
+                    leaves.append(node)
+                    result.append(len(leaves))
+                else:
+                    branches.append(node)
+                    result.append(-len(branches))
+            return result
+
+        slot_format = struct.Struct(f"<{table.TABLE_SIZE}i")
+        tables = [slot_format.pack(*slots(table.table))]
+        skip = []
+        i = 0
+        while i < len(branches):
+            branch = branches[i]
+            tables.append(cls.BRANCH.pack(len(skip), len(branch.skip)))
+            tables.append(slot_format.pack(*slots(branch.table)))
+            skip.extend(branch.skip)
+            i += 1
+
+        records = []
+        keys = bytearray()
+        values = bytearray()
+        for leaf in leaves:
+            key = leaf.key if isinstance(leaf.key, bytes) else leaf.key.encode()
+            value = pickle.dumps(leaf.value)
+            records.append(cls.LEAF.pack(len(keys), len(key), len(values), len(value)))
+            keys += key
+            values += value
+
+        with open(path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, table.TABLE_SIZE, table.compress, alphabet, len(chars), len(table),
+                                    len(branches), len(leaves), len(skip), len(keys), len(values)))
+            f.write(chars.ljust(cls.padded(len(chars)), b"\0"))
+            f.writelines(tables)
+            f.writelines(records)
+            f.write(struct.pack(f"<{len(skip)}I", *skip))
+            f.write(keys)
+            f.write(values)
+
+    @classmethod
+    def open(cls, path: str) -> FrozenInfiniteHashTable[K, V]:
+        """
+        Open a frozen table by memory-mapping its file read-only.
+
+        Args: the path of a file written by freeze
+        Raises: ValueError: when the file does not hold a frozen table
+        Returns: the frozen table
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def close(self) -> None:
+        """
+        Release the mapping of the file.
+        """
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self) -> FrozenInfiniteHashTable[K, V]:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _slot(self, branch: int, pos: int) -> int:
+        """
+        Read a slot of the parent table (branch = -1) or of a sub-table.
+        """
+        if branch < 0:
+            return self.SLOT.unpack_from(self.buffer, self.table_offset + pos * self.SLOT.size)[0]
+        offset = self.branch_offset + branch * self.branch_size + self.BRANCH.size
+        return self.SLOT.unpack_from(self.buffer, offset + pos * self.SLOT.size)[0]
+
+    def _find(self, key: K, location: list | None = None) -> int:
+        """
+        Follow the positions of key down the sub-tables to its key record.
+
+        Args: the key to search for, and optionally a list the went-through
+            positions are added to
+        Raises: KeyError: when the key doesn't exist
+        Returns: the index of the key record
+        Complexity: O(len(key) + comp(K))
+        """
+        self.level = 0
+        branch = -1
+        while True:
+            pos = self.hash(key)
+            slot = self._slot(branch, pos)
+            if slot == 0:
+                raise KeyError(key)
+            if location is not None:
+                location.append(pos)
+            if slot > 0:
+                leaf = slot - 1
+                key_start, key_len, _, _ = self.LEAF.unpack_from(self.buffer, self.leaf_offset + leaf * self.LEAF.size)
+                start = self.key_offset + key_start
+                if self.buffer[start:start + key_len] != (key if isinstance(key, bytes) else key.encode()):
+                    raise KeyError(key)
+                return leaf
+            branch = -slot - 1
+            self.level += 1
+            skip_start, skip_len = self.BRANCH.unpack_from(self.buffer, self.branch_offset + branch * self.branch_size)
+            for i in range(skip_start, skip_start + skip_len):
+                skipped = self.POSITION.unpack_from(self.buffer, self.skip_offset + i * self.POSITION.size)[0]
+                if self.hash(key) != skipped:
+                    raise KeyError(key)
+                if location is not None:
+                    location.append(skipped)
+                self.level += 1
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        Args: the key used for searching its value
+        Raises: KeyError: when the key doesn't exist
+        Returns: the value based on its key
+        Complexity: See _find, plus unpickling the value.
+        """
+        leaf = self._find(key)
+        _, _, value_start, value_len = self.LEAF.unpack_from(self.buffer, self.leaf_offset + leaf * self.LEAF.size)
+        start = self.value_offset + value_start
+        return pickle.loads(self.buffer[start:start + value_len])
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+
+        :complexity: See _find.
+        """
+        try:
+            self._find(key)
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __len__(self) -> int:
+        """
+        Return the total number of (key,value) stored in the hash table
+        """
+        return self.count
+
+    def get_location(self, key: K) -> list[int]:
+        """
+        Get the sequence of positions required to access this key, as
+        InfiniteHashTable.get_location does.
+
+        Args: the key used to get all of its positions
+        Raises: KeyError: when the key doesn't exist
+        Returns: list of all went-through positions of the key
+        Complexity: See _find.
+        """
+        location = []
+        self._find(key, location)
+        return location
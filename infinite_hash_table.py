@@ -1,11 +1,119 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+from heapq import merge
+from operator import itemgetter
+from typing import Generic, Iterable, Iterator, TypeVar
 
 from data_structures.referential_array import ArrayR
-from data_structures.linked_stack import* 
+from data_structures.sparse_array import SparseArray
 K = TypeVar("K")
 V = TypeVar("V")
 
+
+class LeafNode(Generic[K, V]):
+    """
+    A (key, value) entry stored in one position of an InfiniteHashTable.
+    """
+
+    __slots__ = ("key", "value")
+
+    # Explicit node kind, so that a stored value of 0 (or None) is never
+    # mistaken for an internal position.
+    is_leaf = True
+
+    def __init__(self, key: K, value: V) -> None:
+        self.key = key
+        self.value = value
+
+
+class BranchNode:
+    """
+    A position of an InfiniteHashTable that has been split into a sub-table
+    one level further down.
+
+    In path-compressed mode `skip` holds the positions of the levels that
+    were skipped between this position and the sub-table, because every key
+    below shares them. It is always empty otherwise.
+
+    `leaves` and `branches` count the occupied positions of the sub-table
+    by kind, and `slot_sum` adds up their indices, so the position of a
+    sole remaining node is known without scanning the sub-table.
+    """
+
+    __slots__ = ("table", "skip", "leaves", "branches", "slot_sum")
+
+    is_leaf = False
+
+    def __init__(self, table: ArrayR | SparseArray, skip: tuple[int, ...] = ()) -> None:
+        self.table = table
+        self.skip = skip
+        self.leaves = 0
+        self.branches = 0
+        self.slot_sum = 0
+
+
+class ByteAlphabet:
+    """
+    Positions for bytes keys: one position per byte value, followed by the
+    position for keys that have ended.
+    """
+
+    size = 257
+    # Positions follow the order of the characters
+    ordered = True
+
+    def position(self, key: bytes, level: int) -> int:
+        """
+        Complexity: Best case = Worst case = O(1).
+        """
+        if level < len(key):
+            return key[level]
+        return 256
+
+
+class MappedAlphabet:
+    """
+    Positions for keys drawn from a known character set: one position per
+    character, in the given order, followed by the position for keys that
+    have ended. Keys using other characters cannot be stored.
+    """
+
+    def __init__(self, chars: str) -> None:
+        """
+        Args: the characters of the alphabet (repeats are ignored)
+        Complexity: O(len(chars))
+        """
+        self.chars = "".join(dict.fromkeys(chars))
+        self.positions = {char: i for i, char in enumerate(self.chars)}
+        self.size = len(self.chars) + 1
+        self.ordered = list(self.chars) == sorted(self.chars)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str]) -> MappedAlphabet:
+        """
+        Build the smallest ordered alphabet able to hold every given key.
+
+        Complexity: O(L + C*log(C)), where L is the total length of the keys
+            and C the number of distinct characters
+        """
+        chars = set()
+        for key in keys:
+            chars.update(key)
+        return cls("".join(sorted(chars)))
+
+    def position(self, key: str, level: int) -> int:
+        """
+        Raises: KeyError: when the character of key at level is not part of
+            the alphabet
+        Complexity: Best case = Worst case = O(1).
+        """
+        if level < len(key):
+            try:
+                return self.positions[key[level]]
+            except KeyError:
+                raise KeyError(key) from None
+        return self.size - 1
+
+
 class InfiniteHashTable(Generic[K, V]):
     """
     Infinite Hash Table.
@@ -15,22 +123,143 @@ class InfiniteHashTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    Every position of a (sub-)table holds either None, a LeafNode or a
+    BranchNode pointing at the sub-table for the next character.
+
+    With `compress=True`, chains of sub-tables holding a single sub-table are
+    collapsed into one BranchNode whose `skip` records the skipped positions.
+    get_location still reports the positions of the uncompressed table.
+
+    By default a character is placed at ord(char) % 26, so characters 26 code
+    points apart share a position. An `alphabet` (ByteAlphabet for bytes
+    keys, or a MappedAlphabet) gives every character its own position
+    instead. With `sparse=True` sub-tables only store their used positions,
+    which suits large alphabets.
+
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
     TABLE_SIZE = 27
 
-    def __init__(self) -> None:
+    def __init__(self, compress: bool = False, alphabet: ByteAlphabet | MappedAlphabet | None = None,
+                 sparse: bool = False) -> None:
         """
         Initiate a hash table and additional arguements.
+
+        Args:
+            compress: whether single sub-table chains are path-compressed
+            alphabet: the positions of each character (ord(char) % 26 if None)
+            sparse: whether sub-tables only store their used positions
         """
+        self.alphabet = alphabet
+        if alphabet is not None:
+            self.TABLE_SIZE = alphabet.size
+        self.sparse = sparse
         # Create a parent hash table with size = TABLE_SIZE
         self.table = ArrayR(self.TABLE_SIZE)
         # Create a counter counting the total elements (key,value) added to hash table
         self.count = 0
         # Create a level indicating the level of current working hash table
         self.level = 0
-        
+        self.compress = compress
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[K, V]] | dict[K, V], compress: bool = False,
+                   alphabet: ByteAlphabet | MappedAlphabet | None = None,
+                   sparse: bool = False) -> InfiniteHashTable[K, V]:
+        """
+        Build a hash table from (key, value) pairs in one pass per level.
+
+        The keys are partitioned by their position at each level, so every
+        sub-table is created exactly once and holds its final keys. The result
+        is identical to inserting the pairs one by one with __setitem__
+        (the last value given for a repeated key is kept).
+
+        Args: the (key, value) pairs (or a dict) to insert, followed by the
+            arguments of __init__
+        Raises: ValueError: when two keys share every position
+        Returns: the new hash table
+        Complexity: Best case = Worst case = O(N*L + T*self.TABLE_SIZE),
+            where N is the number of keys, L the number of levels each key
+            is hashed at, and T the number of sub-tables created
+        """
+        ih = cls(compress, alphabet, sparse)
+        pairs = list(dict(items).items())
+        ih.count = len(pairs)
+        if pairs:
+            buckets, used = ih._partition(pairs, 0)
+            ih._fill(ih.table, None, buckets, used, 0)
+        return ih
+
+    def _partition(self, pairs: list[tuple[K, V]], level: int) -> tuple[list, list[int]]:
+        """
+        Group (key, value) pairs by their position at a level.
+
+        Args: the pairs to group, and the level to hash them at
+        Raises: None
+        Returns: a list of TABLE_SIZE buckets (None when empty), and the
+            positions of the non-empty buckets
+        Complexity: Best case = Worst case = O(len(pairs) + self.TABLE_SIZE)
+        """
+        self.level = level
+        hash = self.hash
+        buckets = [None] * self.TABLE_SIZE
+        used = []
+        for pair in pairs:
+            pos = hash(pair[0])
+            if buckets[pos] is None:
+                buckets[pos] = [pair]
+                used.append(pos)
+            else:
+                buckets[pos].append(pair)
+        return buckets, used
+
+    def _fill(self, table: ArrayR, owner: BranchNode | None, buckets: list, used: list[int], level: int) -> None:
+        """
+        Fill a (sub-)table from its partitioned pairs, then the sub-table of
+        every bucket that holds more than one key, using an explicit stack
+        so that keys sharing long prefixes don't exhaust the recursion limit.
+
+        Args: the table to fill, the branch owning it (None for the parent
+            table), the buckets and used positions given by _partition, and
+            the level of the table
+        Raises: ValueError: when two keys share every position
+        Returns: None
+        Complexity: See from_items.
+        """
+        # Buckets still to be turned into sub-tables: (table, position, owner of table, bucket, level of table)
+        pending = []
+        while True:
+            if owner is not None:
+                owner.slot_sum = sum(used)
+            for pos in used:
+                bucket = buckets[pos]
+                if len(bucket) == 1:
+                    table[pos] = LeafNode(bucket[0][0], bucket[0][1])
+                    if owner is not None:
+                        owner.leaves += 1
+                    continue
+                if pos == self.TABLE_SIZE - 1:
+                    raise ValueError(f"Keys {bucket[0][0]!r} and {bucket[1][0]!r} share every position")
+                if owner is not None:
+                    owner.branches += 1
+                pending.append((table, pos, bucket, level))
+            if not pending:
+                return
+            parent, pos, bucket, level = pending.pop()
+            level += 1
+            buckets, used = self._partition(bucket, level)
+            skip = []
+            if self.compress:
+                # Every key below shares this level: skip it
+                while len(used) == 1 and used[0] != self.TABLE_SIZE - 1:
+                    skip.append(used[0])
+                    level += 1
+                    buckets, used = self._partition(bucket, level)
+            owner = BranchNode(self._new_table(), tuple(skip))
+            parent[pos] = owner
+            table = owner.table
+
     def hash(self, key: K) -> int:
         """
         Hash the key into the hash table
@@ -40,10 +269,64 @@ class InfiniteHashTable(Generic[K, V]):
         Returns: the position of the key in hash table
         Complexity: Best case = Worst case = O(1).
         """
+        if self.alphabet is not None:
+            return self.alphabet.position(key, self.level)
         if self.level < len(key):
             return ord(key[self.level]) % (self.TABLE_SIZE-1)
         return self.TABLE_SIZE-1
 
+    def _new_table(self) -> ArrayR | SparseArray:
+        """
+        Create an empty sub-table.
+        """
+        if self.sparse:
+            return SparseArray(self.TABLE_SIZE)
+        return ArrayR(self.TABLE_SIZE)
+
+    def _follow_skip(self, branch: BranchNode, key: K, location: list | None = None) -> bool:
+        """
+        Move self.level past the positions skipped by a compressed branch.
+
+        Args: the branch being entered, the key being searched for, and
+            optionally a location list the skipped positions are added to
+        Raises: None
+        Returns: whether key shares every skipped position
+        Complexity: Best case = Worst case = O(len(branch.skip))
+        """
+        for pos in branch.skip:
+            if self.hash(key) != pos:
+                return False
+            if location is not None:
+                location.append(pos)
+            self.level += 1
+        return True
+
+    def _find_leaf(self, key: K) -> LeafNode[K, V]:
+        """
+        Follow the positions of key down the sub-tables to its leaf.
+
+        Args: the key to search for
+        Raises: KeyError: when the key doesn't exist
+        Returns: the leaf holding this key
+        Complexity:
+          Best case: O(comp(K)): key is stored in the parent table
+          Worst case: O(len(key) + comp(K)): key is stored in the deepest sub-table
+        """
+        self.level = 0
+        table = self.table
+        while True:
+            node = table[self.hash(key)]
+            if node is None:
+                raise KeyError(key)
+            if node.is_leaf:
+                if node.key == key:
+                    return node
+                raise KeyError(key)
+            self.level += 1
+            if node.skip and not self._follow_skip(node, key):
+                raise KeyError(key)
+            table = node.table
+
     def __getitem__(self, key: K) -> V:
         """
         Get the value at a certain key
@@ -51,164 +334,162 @@ class InfiniteHashTable(Generic[K, V]):
         Args: the key used for searching its value
         Raises: KeyError: when the key doesn't exist
         Returns: the value based on its key
-        Complexity: 
-          Best case: O(1): 
-            key found at the parent table, at the first position in table
-          Worst case: O(self.TABLE_SIZE*len(key)): 
-            key found at the furthest sub-table, at the last position in table
-        """
-        value = 0
-        # Create a Stack tracking all went-through hash table  
-        tracking = LinkedStack()
-        # Push parent table to tracking
-        tracking.push(self.table)
-        # Create a location list getting all went-through positions of the key
-        location = self.get_location(key)
-
-        for i in range(len(location)-1):
-            # Get the current table for investigating
-            cur = tracking.pop()
-            for j in range(self.TABLE_SIZE):
-                # If current position matches location list
-                if j == location[i]:
-                    # Push the current sub-table for tracking
-                    tracking.push(cur[j][1])
-                    break
-        # Get the value at the final hash table where the key is located
-        value = tracking.peek()[location[-1]][0][1]
-        # If no value found: key doesnt exist
-        if value == 0:
-            raise KeyError('Key doesnt exist')
-        
-        return value
+        Complexity: See _find_leaf.
+        """
+        return self._find_leaf(key).value
 
     def __setitem__(self, key: K, value: V) -> None:
         """
         Set an (key, value) pair in our hash table.
 
+        If the position of key is taken by another key, both are pushed into a
+        new sub-table, one level deeper, until their positions differ.
+
         Args: the key and value to be inserted to hash table
-        Raises: None
+        Raises:
+            ValueError: when key and another key share every position
+            KeyError: when key has a character outside the alphabet
         Returns: None
-        Complexity: 
-          Best case: O(1): 
-            (key,value) can be added at the parent table, at the first position in table 
-            (no collision)
-          Worst case: O(self.TABLE_SIZE*len(key)): 
-            (key,value) can be added at the furthest sub-table, at the last position in table
-        """
-        # Increment number of item added to hash table
-        self.count += 1
-        # Initialise the current level = 0, indicating the parent hash table
+        Complexity:
+          Best case: O(1):
+            (key,value) can be added at the parent table (no collision)
+          Worst case: O(self.TABLE_SIZE*len(key)):
+            (key,value) collides with a key sharing its whole prefix, so one new
+            sub-table is created for every shared character
+        """
         self.level = 0
-        # Create a storage of unallocated items
-        # An item includes [key, its value, its position in hash table]
-        item_store = LinkedStack()
-        # Create a Stack tracking all went-through hash table
-        tracking = LinkedStack()
-        # Position of hashed key in parent table
-        pos = self.hash(key)
-        # Add item to item's storage
-        item_store.push([key,value,pos])
-        # Add parent table for tracking
-        tracking.push(self.table)
-        while (item_store.is_empty() == False):
-            # Take out unallocated item from storage for hashing
-            item = item_store.pop()
-            # Take the current table from tracking & hash item to this table
-            cur = tracking.peek()
-            # Position of hashed key in current table
-            item[2] = self.hash(item[0])
-            # If there is no item in this position
-            if cur[item[2]] == None:
-                # Add item to this position
-                cur[item[2]] = []
-                cur[item[2]].append(item)
+        table = self.table
+        # Branch owning the current table (None for the parent table)
+        owner = None
+        while True:
+            pos = self.hash(key)
+            node = table[pos]
+            if node is None:
+                table[pos] = LeafNode(key, value)
+                if owner is not None:
+                    owner.leaves += 1
+                    owner.slot_sum += pos
+                self.count += 1
+                return
+            if not node.is_leaf:
+                # Position was split before: move to its sub-table
+                self.level += 1
+                if node.skip:
+                    for i, skipped in enumerate(node.skip):
+                        new_pos = self.hash(key)
+                        if new_pos != skipped:
+                            # Key leaves the compressed path: split it at this level
+                            branch = BranchNode(self._new_table(), node.skip[:i])
+                            node.skip = node.skip[i + 1:]
+                            branch.table[skipped] = node
+                            branch.table[new_pos] = LeafNode(key, value)
+                            branch.leaves = branch.branches = 1
+                            branch.slot_sum = skipped + new_pos
+                            table[pos] = branch
+                            self.count += 1
+                            return
+                        self.level += 1
+                table = node.table
+                owner = node
+                continue
+            if node.key == key:
+                node.value = value
+                return
+            # Collision with another key: find the level where the two keys separate
+            self.level += 1
+            shared = []
+            old_pos = self.hash(node.key)
+            new_pos = self.hash(key)
+            while old_pos == new_pos:
+                if old_pos == self.TABLE_SIZE - 1:
+                    raise ValueError(f"Keys {key!r} and {node.key!r} share every position")
+                shared.append(old_pos)
+                self.level += 1
+                old_pos = self.hash(node.key)
+                new_pos = self.hash(key)
+            if owner is not None:
+                owner.leaves -= 1
+                owner.branches += 1
+            if self.compress:
+                branch = BranchNode(self._new_table(), tuple(shared))
             else:
-                # If this position was used before (no real item located currently)
-                if len(cur[item[2]]) == 2:
-                    # Take back the item to storage and move to next sub-table
-                    tracking.push(cur[item[2]][1])
-                    item_store.push(item)
-                    # Increment the current level
-                    self.level += 1
-
-                # If there is already an item in this position
-                else:
-                    # Push both items to unallocated storage
-                    item2 = cur[item[2]][0]
-                    item_store.push(item)
-                    item_store.push(item2)
-                    # Add a marker to this collided position, indicating it was used
-                    char_count = self.level + 1
-                    dict_item = [item[0][0:char_count],0,item[2]]
-                    cur[item[2]][0] = (dict_item)
-                    # print("Same")
-                    # print(item[0],item2[0])
-                    # print(dict_item)
-                    self.level += 1
-                    # Create new sub hash table at current collided position
-                    cur[item[2]].append(ArrayR(self.TABLE_SIZE))  
-                    # Add this sub-table for tracking                  
-                    tracking.push(cur[item[2]][1])
-        return
-
+                # One sub-table for every shared position
+                for shared_pos in shared:
+                    branch = BranchNode(self._new_table())
+                    branch.branches = 1
+                    branch.slot_sum = shared_pos
+                    table[pos] = branch
+                    table = branch.table
+                    pos = shared_pos
+                branch = BranchNode(self._new_table())
+            table[pos] = branch
+            branch.table[old_pos] = node
+            branch.table[new_pos] = LeafNode(key, value)
+            branch.leaves = 2
+            branch.slot_sum = old_pos + new_pos
+            self.count += 1
+            return
 
     def __delitem__(self, key: K) -> None:
         """
         Deletes a (key, value) pair in our hash table.
 
-        Args: the key and value to be deleted from hash table
+        Any sub-table left holding a single key is collapsed, moving that key
+        up into the position of the sub-table. The occupancy counters of each
+        branch tell whether it can collapse, and where its sole remaining node
+        is, without scanning its sub-table.
+
+        Args: the key to be deleted from hash table
         Raises: KeyError: when the key doesn't exist
         Returns: None
-        Complexity: 
-          Best case: O(1): 
-            (key, value) is deleted at the parent table, at the first position in table
-          Worst case: O(self.TABLE_SIZE*len(key)): 
-            (key, value) is deleted at the furthest sub-table, at the last position in table
+        Complexity: Best case = Worst case = O(len(key) + comp(K)):
+            the path of the key is walked once down and at most once up
         """
-        # Decrement the number of item in hash table
-        self.count -= 1
-        # Get sequence of positions of key
-        location = self.get_location(key)
-        # Create a Stack tracking all went-through hash table of this key
-        tracking = LinkedStack()
-        tracking.push(self.table)
-        # Push all tables' location to Stack, from parent table to table containing key
-        for i in range(len(location)-1):
-           # Get current table location
-           cur = tracking.peek()
-           tracking.push(cur[location[i]][1])
+        # Track every went-through table with the position used in it and
+        # the branch owning it (None for the parent table)
+        path = []
+        self.level = 0
+        table = self.table
+        owner = None
+        while True:
+            pos = self.hash(key)
+            node = table[pos]
+            if node is None or (node.is_leaf and node.key != key):
+                raise KeyError(key)
+            path.append((table, pos, owner))
+            if node.is_leaf:
+                break
+            self.level += 1
+            if node.skip and not self._follow_skip(node, key):
+                raise KeyError(key)
+            table = node.table
+            owner = node
 
         # Delete item (key,value) from the current table
-        tracking.peek()[location[-1]] = None
-        # If deleted item is in parent table: Do nothing
-        if len(location) == 1:
+        table[pos] = None
+        self.count -= 1
+        if owner is None:
             return
-        else:
-            # Check if there is any item left in hash table other than deleted item
-            for k in range(len(location)-1):
-                cur = tracking.pop()
-                # Initialize counter counting any item left
-                element_count = 0   
-                for j in range(self.TABLE_SIZE):
-                    # If there is any item left: increment counter
-                    if cur[j] is not None:
-                        if (cur[j][0][1] != 0) and (cur[j][0][0] != key):
-                            item = cur[j][0]
-                            element_count += 1
-                # If there is only 1 item found
-                if element_count == 1:
-                    # Previous table location
-                    prev = tracking.peek()
-                        #print(location[len(location) - k - 1])
-                        #print(prev[location[len(location) - k - 1]])
-                    # Add this item to higher-level table
-                    prev[location[-1 -k - 1]][0] = item
-                    # Collapse the current table
-                    cur = None
-                # If there are more than 1 item left, or we are at parent table
-                else:
-                    break
+        owner.leaves -= 1
+        owner.slot_sum -= pos
+
+        # Collapse sub-tables holding a single node, from the deepest one up
+        for i in range(len(path) - 1, 0, -1):
+            table, _, owner = path[i]
+            if owner.leaves + owner.branches != 1:
+                return
+            survivor = table[owner.slot_sum]
+            parent, parent_pos, parent_owner = path[i - 1]
+            if not survivor.is_leaf:
+                if self.compress:
+                    # Merge the now single-child branch into its only child
+                    survivor.skip = owner.skip + (owner.slot_sum,) + survivor.skip
+                    parent[parent_pos] = survivor
+                return
+            parent[parent_pos] = survivor
+            if parent_owner is not None:
+                parent_owner.branches -= 1
+                parent_owner.leaves += 1
 
     def __len__(self):
         """
@@ -218,11 +499,188 @@ class InfiniteHashTable(Generic[K, V]):
 
     def __str__(self) -> str:
         """
-        String representation.
+        Returns all the key/value pairs in our hash table (no particular
+        order).
+
+        Complexity: O(N * (str(key) + str(value))) where N is the number of
+            positions in every (sub-)table
+        """
+        result = ""
+        for key, value in self.iter_items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
+
+    def __iter__(self) -> Iterator[K]:
+        """
+        Iterate over all keys in the hash table (no particular order).
+        """
+        for key, _ in self.iter_items():
+            yield key
+
+    def keys(self) -> list[K]:
+        """
+        Returns all keys in the hash table (no particular order).
 
-        Not required but may be a good testing tool.
+        Complexity: See iter_items.
+        """
+        return [key for key, _ in self.iter_items()]
+
+    def values(self) -> list[V]:
+        """
+        Returns all values in the hash table (no particular order).
+
+        Complexity: See iter_items.
+        """
+        return [value for _, value in self.iter_items()]
+
+    def iter_items(self) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair, walking the sub-tables
+        depth first (no particular order).
+
+        Args: None
+        Raises: None
+        Returns: an iterator of (key, value) pairs
+        Complexity: O(T*self.TABLE_SIZE) for the whole iteration, where T is
+            the number of (sub-)tables
         """
-        raise NotImplementedError()
+        return self._iter_table(self.table)
+
+    def _iter_table(self, table: ArrayR) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair stored in and below a table.
+
+        Complexity: See iter_items.
+        """
+        tracking = [table]
+        while tracking:
+            table = tracking.pop()
+            for pos in range(self.TABLE_SIZE):
+                node = table[pos]
+                if node is not None:
+                    if node.is_leaf:
+                        yield node.key, node.value
+                    else:
+                        tracking.append(node.table)
+
+    def iter_prefix(self, prefix: K) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair whose key starts with prefix
+        (no particular order).
+
+        Only the sub-table reached by following the positions of prefix is
+        walked.
+
+        Args: the prefix keys must start with
+        Raises: None
+        Returns: an iterator of (key, value) pairs
+        Complexity: O(len(prefix) + T*self.TABLE_SIZE + M*len(prefix)), where T
+            is the number of sub-tables below the prefix and M the number of
+            keys stored there
+        """
+        self.level = 0
+        table = self.table
+        try:
+            while self.level < len(prefix):
+                node = table[self.hash(prefix)]
+                if node is None:
+                    return
+                if node.is_leaf:
+                    if node.key[:len(prefix)] == prefix:
+                        yield node.key, node.value
+                    return
+                self.level += 1
+                for pos in node.skip:
+                    if self.level >= len(prefix):
+                        break
+                    if self.hash(prefix) != pos:
+                        return
+                    self.level += 1
+                table = node.table
+        except KeyError:
+            # Prefix has a character outside the alphabet
+            return
+        # Different characters can share a position, so keys are still checked
+        for key, value in self._iter_table(table):
+            if key[:len(prefix)] == prefix:
+                yield key, value
+
+    def iter_sorted(self) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair in ascending key order.
+
+        With an ordered alphabet the positions already follow the order of
+        the characters, so the sub-tables are walked in position order, with
+        the key ending at each level first. Otherwise characters sharing a
+        position are not necessarily adjacent in order, so the sorted streams
+        of each sub-table are merged.
+
+        Args: None
+        Raises: None
+        Returns: an iterator of (key, value) pairs
+        Complexity:
+          Ordered alphabet: O(T*self.TABLE_SIZE) for the whole iteration
+          Otherwise: O(T*self.TABLE_SIZE + N*D*log(self.TABLE_SIZE))
+          where T is the number of (sub-)tables, N the number of keys and D
+          the depth of the deepest sub-table
+        """
+        if self.alphabet is not None and self.alphabet.ordered:
+            return self._iter_ordered_table(self.table)
+        return self._iter_sorted_table(self.table)
+
+    def _iter_ordered_table(self, table: ArrayR) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair stored in and below a table in
+        position order, starting with the key that ends at this level.
+        The sub-tables being walked are kept on an explicit stack, so deep
+        tables don't exhaust the recursion limit.
+
+        Complexity: See iter_sorted.
+        """
+        # The tables being walked, with the next position of each, -1 before the key ending at that level
+        tracking = []
+        pos = -1
+        while True:
+            if pos == -1:
+                node = table[self.TABLE_SIZE - 1]
+                if node is not None:
+                    yield node.key, node.value
+                pos = 0
+            elif pos == self.TABLE_SIZE - 1:
+                if not tracking:
+                    return
+                table, pos = tracking.pop()
+            else:
+                node = table[pos]
+                pos += 1
+                if node is not None:
+                    if node.is_leaf:
+                        yield node.key, node.value
+                    else:
+                        tracking.append((table, pos))
+                        table, pos = node.table, -1
+
+    def _iter_sorted_table(self, table: ArrayR) -> Iterator[tuple[K, V]]:
+        """
+        Lazily yield every (key, value) pair stored in and below a table in
+        ascending key order.
+
+        Complexity: See iter_sorted.
+        """
+        leaves = []
+        branches = []
+        for pos in range(self.TABLE_SIZE):
+            node = table[pos]
+            if node is not None:
+                if node.is_leaf:
+                    leaves.append((node.key, node.value))
+                else:
+                    branches.append(self._iter_sorted_table(node.table))
+        leaves.sort(key=itemgetter(0))
+        if branches:
+            yield from merge(leaves, *branches, key=itemgetter(0))
+        else:
+            yield from leaves
 
     def get_location(self, key):
         """
@@ -232,49 +690,32 @@ class InfiniteHashTable(Generic[K, V]):
         Raises: KeyError: when the key doesn't exist
         Returns: list of all went-through positions of the key
         Complexity:
-          Best case: O(1): 
-            key found at the parent table, at the first position in table
-          Worst case: O(self.TABLE_SIZE*(len(key)+1)): 
-            key found at the furthest sub-table, at the last position in table
+          Best case: O(comp(K)): key is stored in the parent table
+          Worst case: O(len(key) + comp(K)): key is stored in the deepest sub-table
         """
-        # Initialize the list containing the sequence of positions
         location = []
-        # Create a Stack tracking all went-through hash table
-        tracking = LinkedStack()
-        # Add the parent hash table for tracking
-        tracking.push(self.table)
-        # Initiate counter counting each character (left->right) in the key
-        char_count = 1
-        while (tracking.is_empty() == False):
-            # Pop current hash table for investigating
-            cur = tracking.pop()
-            for i in range(self.TABLE_SIZE):
-                # If the position in table is not empty
-                if cur[i] is not None:
-                    # If the key in this position totally matched with input key
-                    if (key == cur[i][0][0]) & (cur[i][0][1] != 0):
-                        # Add this location to list and return the list
-                        location.append(i)
-                        return location
-                    # If the key in this position partially matched with input key
-                    if key[0:char_count] == cur[i][0][0]:
-                        # Add the sub-table in this position for tracking
-                        tracking.push(cur[i][1])
-                        # Increment key's character counter
-                        char_count += 1
-                        # Add this location to list
-                        location.append(i)
-                        break
-        if len(location) == 0:
-            # If there is no location found in hash table: Key doesnt exist
-            raise KeyError('Key doesnt exist')
-        return location
+        self.level = 0
+        table = self.table
+        while True:
+            pos = self.hash(key)
+            node = table[pos]
+            if node is None:
+                raise KeyError(key)
+            location.append(pos)
+            if node.is_leaf:
+                if node.key == key:
+                    return location
+                raise KeyError(key)
+            self.level += 1
+            if node.skip and not self._follow_skip(node, key, location):
+                raise KeyError(key)
+            table = node.table
 
     def __contains__(self, key: K) -> bool:
         """
         Checks to see if the given key is in the Hash Table
 
-        :complexity: See linear probe.
+        :complexity: See _find_leaf.
         """
         try:
             _ = self[key]
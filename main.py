@@ -282,12 +282,13 @@ class MyWindow(arcade.Window):
             t = deserialize(json.loads(f.read()))
         try:
             # Try to add all existing mountains
-            for mountain in t.collect_all_mountains():
-                self.mountain_manager.add_mountain(mountain)
+            self.mountain_manager = MountainManager.from_trail(t)
         except NotImplementedError:
             pass
         self.mountain = TrailDraw(t)
         self.draw_box = None
+        # The version of the mountain manager the graph data was computed at, None when not computed yet
+        self.graph_version = None
 
     def on_draw(self) -> None:
         """Draw everything"""
@@ -383,6 +384,10 @@ class MyWindow(arcade.Window):
 
     def on_graph_clicked(self):
         self.showing_graph = True
+        if self.graph_version == self.mountain_manager.version:
+            # No mountain has changed since the graph data was computed
+            return
+        self.graph_version = self.mountain_manager.version
         import colorsys
         def get_col(index, total):
             return [
@@ -392,23 +397,23 @@ class MyWindow(arcade.Window):
         groups = self.mountain_manager.group_by_difficulty()
         to = MountainOrganiser()
         positions = DoubleKeyTable()
-        positions.hash1 = lambda k: (k % positions.table_size)
         all_mountains = []
         for i, group in enumerate(groups):
             to.add_mountains(group)
-            for mountain in group:
-                positions[mountain.difficulty_level, mountain.name] = []
+            positions.set_many((mountain.difficulty_level, mountain.name, []) for mountain in group)
             all_mountains.extend(group)
-            for mountain in all_mountains:
-                positions[mountain.difficulty_level, mountain.name].append(to.cur_position(mountain))
+            keys = [(mountain.difficulty_level, mountain.name) for mountain in all_mountains]
+            for mountain, history in zip(all_mountains, positions.get_many(keys)):
+                history.append(to.cur_position(mountain))
+        keys = [(mountain.difficulty_level, mountain.name) for mountain in all_mountains]
         self.graph_data = [
             [
                 get_col(i, len(all_mountains)),
-                len(groups) - len(positions[mountain.difficulty_level, mountain.name]),
+                len(groups) - len(history),
                 mountain.name,
-                positions[mountain.difficulty_level, mountain.name]
+                history
             ]
-            for i, mountain in enumerate(all_mountains)
+            for i, (mountain, history) in enumerate(zip(all_mountains, positions.get_many(keys)))
         ]
 
     def on_save_file_clicked(self):
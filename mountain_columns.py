@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from mountain import Mountain
+
+class MountainColumns:
+    """
+    Columnar copy of the difficulty, length and name of stored mountains, for vectorised analytics.
+
+    Row i holds the fields of the mountain at position i of the storage it mirrors, in contiguous NumPy arrays
+    that double in capacity when full. Names are interned: each distinct name gets an id, and the name column
+    holds ids.
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        """
+        Initiate empty columns
+
+        Args: the initial number of rows allocated
+        Raises: ImportError: NumPy is not installed
+        Returns: None
+        Complexity: Best case = Worst case = O(capacity)
+        """
+        if np is None:
+            raise ImportError("MountainColumns needs NumPy")
+        # Initiate the number of rows in use
+        self.size:int = 0
+        self.difficulty = np.empty(capacity, dtype=np.int64)
+        self.length = np.empty(capacity, dtype=np.int64)
+        self.name_id = np.empty(capacity, dtype=np.int64)
+        # Initiate the interned names: name -> id, and names by id
+        self.name_ids:dict = {}
+        self.names:list = []
+
+    def _reserve(self, capacity: int):
+        """
+        Grow the columns to hold at least capacity rows
+
+        Args: the number of rows needed
+        Raises: None
+        Returns: None
+        Complexity:
+          Best case = O(1): the columns are big enough
+          Worst case = O(capacity): the columns are copied into arrays of twice the size or more
+        """
+        if capacity <= len(self.difficulty):
+            return
+        capacity = max(capacity, 2 * len(self.difficulty))
+        for column in ("difficulty", "length", "name_id"):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def intern(self, name: str) -> int:
+        """
+        Return the id of a name, giving it the next id when it is new
+
+        Args: the name
+        Raises: None
+        Returns: the id of the name
+        Complexity: Best case = Worst case = O(len(name)): hashing the name
+        """
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, mountain: Mountain):
+        """
+        Add a row for a mountain
+
+        Args: the mountain
+        Raises: None
+        Returns: None
+        Complexity: See _reserve, amortised O(1)
+        """
+        self._reserve(self.size + 1)
+        self.size += 1
+        self.set(self.size - 1, mountain)
+
+    def extend(self, mountains: list):
+        """
+        Add a row for each mountain of a list, growing the columns once
+
+        Args: the mountains
+        Raises: None
+        Returns: None
+        Complexity: Best case = Worst case = O(len(mountains)), plus _reserve
+        """
+        start = self.size
+        self._reserve(start + len(mountains))
+        self.size += len(mountains)
+        self.difficulty[start:self.size] = [mountain.difficulty_level for mountain in mountains]
+        self.length[start:self.size] = [mountain.length for mountain in mountains]
+        self.name_id[start:self.size] = [self.intern(mountain.name) for mountain in mountains]
+
+    def set(self, position: int, mountain: Mountain):
+        """
+        Write the fields of a mountain into a row
+
+        Args: the row, the mountain
+        Raises: None
+        Returns: None
+        Complexity: See intern
+        """
+        self.difficulty[position] = mountain.difficulty_level
+        self.length[position] = mountain.length
+        self.name_id[position] = self.intern(mountain.name)
+
+    def remove(self, position: int):
+        """
+        Remove a row, moving the last row into its place, as MountainManager does with its storage
+
+        Args: the row
+        Raises: None
+        Returns: None
+        Complexity: Best case = Worst case = O(1)
+        """
+        self.size -= 1
+        for column in (self.difficulty, self.length, self.name_id):
+            column[position] = column[self.size]
+
+    def filter(self, difficulty: tuple = None, length: tuple = None, name: str = None):
+        """
+        Return the rows with difficulty and length in specified ranges, and with specified name
+
+        Args: the (lowest, highest) difficulty and length, inclusive, where a range or either of its bounds
+          can be None for no bound, and the name, None for any name
+        Raises: None
+        Returns: array of the matching rows, ascending
+        Complexity: Best case = Worst case = O(self.size), vectorised
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for column, bounds in ((self.difficulty, difficulty), (self.length, length)):
+            if bounds is not None:
+                lo, hi = bounds
+                if lo is not None:
+                    mask &= column[:self.size] >= lo
+                if hi is not None:
+                    mask &= column[:self.size] <= hi
+        if name is not None:
+            if name not in self.name_ids:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.name_id[:self.size] == self.name_ids[name]
+        return np.flatnonzero(mask)
+
+    def mean_length_by_difficulty(self) -> list:
+        """
+        Return the mean length of the mountains of each difficulty
+
+        Args: None
+        Raises: None
+        Returns: list of (difficulty, mean length) pairs, by ascending difficulty
+        Complexity: Best case = Worst case = O(self.size * log(self.size)), vectorised
+        """
+        difficulties, groups = np.unique(self.difficulty[:self.size], return_inverse=True)
+        totals = np.bincount(groups, weights=self.length[:self.size])
+        counts = np.bincount(groups)
+        return [(int(diff), float(total / count)) for diff, total, count in zip(difficulties, totals, counts)]
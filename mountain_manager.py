@@ -1,62 +1,542 @@
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from data_structures.hash_table import LinearProbeTable
 from mountain import Mountain
+from mountain_columns import MountainColumns
+
+@dataclass
+class MountainEvent:
+    """
+    A change made to the mountains of a MountainManager.
+
+    kind is "add", "remove" or "edit".
+    mountain is the mountain added, the mountain removed, or the mountain stored by the edit.
+    old is only set by an edit, and is the mountain replaced: the stored mountain itself when it was replaced by
+    another, or a copy of the mountain from before it was changed in place.
+    """
+
+    kind: str
+    mountain: Mountain
+    old: Mountain = None
 
 class MountainManager:
 
-    def __init__(self) -> None:
+    def __init__(self, columnar: bool = False) -> None:
         """
         Initiate neccessary arguements
+
+        Args: whether to also keep the difficulty, length and name of the mountains in NumPy columns
+          (see MountainColumns), which query and the aggregates then use
+        Raises: ImportError: columnar is True and NumPy is not installed
+        """
+        # Initiate the number of changes published, and the callbacks they are published to
+        self.version:int = 0
+        self.subscribers:list = []
+        # Initiate the events of the batch being made, or None when there is none (see batch)
+        self.pending = None
+        self._clear(columnar)
+
+    def _clear(self, columnar: bool):
+        """
+        Empty the manager
+
+        Args: whether to keep NumPy columns (see __init__)
+        Raises: ImportError: columnar is True and NumPy is not installed
+        Returns: None
+        Complexity: Best case = Worst case = O(1)
         """
         # Initiate storage (list) storing all mountains added
         self.storage:list = []
-        # Initiate the maximum difficulty of all mountains added so far
-        self.max_diff:int = 0
+        # Initiate the sum of the difficulties of all mountains stored
+        self.diff_sum:int = 0
+        # Initiate the index of mountains by difficulty: difficulty -> list of the mountains with it
+        self.buckets:LinearProbeTable = LinearProbeTable()
+        # Initiate the list of the difficulties in the index, in ascending order
+        self.difficulties:list = []
+        # Initiate the index of mountains by length, in the same way
+        self.length_buckets:LinearProbeTable = LinearProbeTable()
+        self.lengths:list = []
+        # Initiate the handles of the mountains stored:
+        # id(mountain) -> [position in storage, position in its difficulty bucket, position in its length bucket,
+        #                  difficulty and length it was indexed with]
+        self.handles:LinearProbeTable = LinearProbeTable()
+        # Initiate the columns, row i holding the fields of storage[i], or None when not columnar
+        self.columns = MountainColumns() if columnar else None
+
+    def subscribe(self, callback, replay: bool = False):
+        """
+        Publish every future change of the mountains to a callback
+
+        Each change is published as callback(version, events): version is the number of changes made so far,
+        and events is the list of MountainEvents of the change, in the order made. A single call to add_mountain,
+        add_many, remove_mountain, remove_many or edit_mountain is a single change. The changes made in a batch
+        are published together, with the version of the last of them.
+
+        Args: the callback, and whether to first publish the mountains stored, as "add" events
+          sent to this callback only, with the current version
+        Raises: None
+        Returns: the callback, for unsubscribe
+        Complexity:
+          Best case = O(1): replay is False
+          Worst case = O(len(self.storage)) plus the callback: replay is True
+        """
+        self.subscribers.append(callback)
+        if replay and self.storage:
+            callback(self.version, [MountainEvent("add", mountain) for mountain in self.storage])
+        return callback
+
+    def unsubscribe(self, callback):
+        """
+        Stop publishing changes to a callback
+
+        Args: the callback
+        Raises: ValueError: callback is not subscribed
+        Returns: None
+        Complexity: Best case = Worst case = O(s): s is the number of subscribers
+        """
+        self.subscribers.remove(callback)
+
+    def _publish(self, kind: str, mountains: list, olds: list = None):
+        """
+        Count a change, and publish it to the subscribers, or add its events to the batch being made
+
+        Args: the kind of the events of the change, their mountains, and for edits, the mountains replaced
+        Raises: None
+        Returns: None
+        Complexity:
+          Best case = O(1): there are no subscribers, so no events are made
+          Worst case = O(m + s) plus the callbacks: m is len(mountains) and s the number of subscribers
+        """
+        if not mountains:
+            return
+        self.version += 1
+        if not self.subscribers:
+            return
+        if olds is None:
+            events = [MountainEvent(kind, mountain) for mountain in mountains]
+        else:
+            events = [MountainEvent(kind, mountain, old) for mountain, old in zip(mountains, olds)]
+        if self.pending is not None:
+            self.pending.extend(events)
+            return
+        self._send(events)
+
+    def _send(self, events: list):
+        """
+        Send the events of a change to every subscriber, with the current version
+        """
+        for callback in list(self.subscribers):
+            callback(self.version, events)
+
+    @contextmanager
+    def batch(self):
+        """
+        Publish the changes made in a with block together, when the block ends
+
+        e.g. with manager.batch(): manager.remove_mountain(m1); manager.add_mountain(m2)
+        Batches can be nested, the outermost one publishing.
+
+        Args: None
+        Raises: None
+        Returns: context manager
+        Complexity: See _publish
+        """
+        if self.pending is not None:
+            yield
+            return
+        self.pending = []
+        try:
+            yield
+        finally:
+            events, self.pending = self.pending, None
+            if events:
+                self._send(events)
+
+    @staticmethod
+    def _bucket_add(buckets: LinearProbeTable, keys: list, key: int, mountain: Mountain):
+        """
+        Add a mountain to the bucket of key in an index
+
+        Args: the buckets and sorted keys of the index, the key of the mountain, the mountain to be indexed
+        Raises: None
+        Returns: the position of the mountain in its bucket
+        Complexity:
+          Best case = O(1): the bucket already exists
+          Worst case = O(len(keys)): a new key is inserted into the sorted list
+        """
+        # Probe once, for either the existing bucket or the slot of a new one
+        position = buckets._linear_probe(key, True)
+        if buckets.array[position] is not None:
+            bucket = buckets.array[position][1]
+            bucket.append(mountain)
+            return len(bucket) - 1
+        # First mountain of this key
+        buckets[key] = [mountain]
+        insort(keys, key)
+        return 0
+
+    @staticmethod
+    def _bucket_add_many(buckets: LinearProbeTable, keys: list, mountain_keys: list, mountains: list):
+        """
+        Add mountains to the buckets of their keys in an index, creating the new buckets at once
+
+        Args: the buckets and sorted keys of the index, the key of each mountain, the mountains to be indexed
+        Raises: None
+        Returns: list of the position of each mountain in its bucket
+        Complexity:
+          Best case = Worst case = O(m + k*log(k)): m is len(mountains), k the number of keys after the addition.
+            The buckets table grows at most once, and the sorted keys are merged once.
+        """
+        # Find the bucket of every distinct key, creating those of the new keys
+        lists = {}
+        new_keys = []
+        for key in set(mountain_keys):
+            if key in buckets:
+                lists[key] = buckets[key]
+            else:
+                new_keys.append(key)
+        buckets.reserve(len(new_keys))
+        for key in new_keys:
+            lists[key] = buckets[key] = []
+        keys.extend(new_keys)
+        keys.sort()
+        positions = []
+        for key, mountain in zip(mountain_keys, mountains):
+            bucket = lists[key]
+            positions.append(len(bucket))
+            bucket.append(mountain)
+        return positions
+
+    def _bucket_remove(self, buckets: LinearProbeTable, keys: list, key: int, mountain: Mountain, slot: int):
+        """
+        Remove a mountain from the bucket of key in an index, moving the last mountain of the bucket into its place
+
+        Args: the buckets and sorted keys of the index, the key the mountain was indexed with,
+          the mountain to be removed, which must be stored, and the position in handles of its position in the bucket
+        Raises: None
+        Returns: None
+        Complexity:
+          Best case = O(1): the bucket still holds mountains
+          Worst case = O(len(keys)): the key is removed from the sorted list, as its bucket becomes empty
+        """
+        bucket = buckets[key]
+        last = bucket.pop()
+        if last is not mountain:
+            position = self.handles[id(mountain)][slot]
+            bucket[position] = last
+            self.handles[id(last)][slot] = position
+        if len(bucket) == 0:
+            # Last mountain of this key
+            del buckets[key]
+            keys.pop(bisect_left(keys, key))
+
+    def _index_add(self, mountain: Mountain, position: int):
+        """
+        Add a mountain to the indexes, and give it a handle
+
+        Args: the mountain to be indexed, its position in storage
+        Raises: None
+        Returns: None
+        Complexity: See _bucket_add
+        """
+        self.diff_sum += mountain.difficulty_level
+        self.handles[id(mountain)] = [
+            position,
+            self._bucket_add(self.buckets, self.difficulties, mountain.difficulty_level, mountain),
+            self._bucket_add(self.length_buckets, self.lengths, mountain.length, mountain),
+            mountain.difficulty_level,
+            mountain.length,
+        ]
+
+    def _index_remove(self, mountain: Mountain):
+        """
+        Remove a mountain from the indexes, and drop its handle
+
+        The mountain is removed from the buckets of the difficulty and length in its handle, as it may have been
+        changed in place since it was indexed.
+
+        Args: the mountain to be removed, which must be stored
+        Raises: None
+        Returns: None
+        Complexity: See _bucket_remove
+        """
+        _, _, _, diff, length = self.handles[id(mountain)]
+        self.diff_sum -= diff
+        self._bucket_remove(self.buckets, self.difficulties, diff, mountain, 1)
+        self._bucket_remove(self.length_buckets, self.lengths, length, mountain, 2)
+        del self.handles[id(mountain)]
+
+    @property
+    def max_diff(self) -> int:
+        """
+        Return the maximum difficulty of the mountains stored, 0 when there are none
+
+        Complexity: Best case = Worst case = O(1)
+        """
+        return self.difficulties[-1] if self.difficulties else 0
+
+    @property
+    def min_diff(self) -> int:
+        """
+        Return the minimum difficulty of the mountains stored, 0 when there are none
+
+        Complexity: Best case = Worst case = O(1)
+        """
+        return self.difficulties[0] if self.difficulties else 0
+
+    def count_with_difficulty(self, diff: int) -> int:
+        """
+        Return the number of mountains with specified difficulty
+
+        Args: difficulty to count mountains with
+        Raises: None
+        Returns: the size of the bucket of this difficulty
+        Complexity: Best case = Worst case = O(1)
+        """
+        if diff not in self.buckets:
+            return 0
+        return len(self.buckets[diff])
+
+    def difficulty_histogram(self) -> list:
+        """
+        Return the number of mountains of each difficulty
+
+        Args: None
+        Raises: None
+        Returns: list of (difficulty, number of mountains) pairs, by ascending difficulty
+        Complexity: Best case = Worst case = O(len(self.difficulties))
+        """
+        return [(diff, len(self.buckets[diff])) for diff in self.difficulties]
+
+    def difficulty_summary(self) -> dict:
+        """
+        Return a summary of the distribution of difficulties
+
+        Args: None
+        Raises: None
+        Returns: dict of the number of mountains ("count"), of distinct difficulties ("distinct"),
+          and the minimum ("min"), maximum ("max") and mean ("mean", 0 when empty) difficulty
+        Complexity: Best case = Worst case = O(1)
+        """
+        count = len(self.storage)
+        return {
+            "count": count,
+            "distinct": len(self.difficulties),
+            "min": self.min_diff,
+            "max": self.max_diff,
+            "mean": self.diff_sum / count if count else 0,
+        }
+
+    def _find(self, mountain: Mountain, equal: bool = True):
+        """
+        Find the position of a mountain in storage
+
+        Args: the mountain to be found, and whether a stored mountain equal to it may be returned
+          when it is not stored itself
+        Raises: None
+        Returns: the position in storage, or None when there is no such mountain
+        Complexity:
+          Best case = O(1): the mountain itself is stored, and found through its handle
+          Worst case = O(len(self.storage)): the mountain is not stored itself,
+            and the storage is searched for an equal one
+        """
+        key = id(mountain)
+        if key in self.handles:
+            position = self.handles[key][0]
+            if self.storage[position] is mountain:
+                return position
+        if equal:
+            for i in range(len(self.storage)):
+                if self.storage[i] == mountain:
+                    return i
+        return None
 
     def add_mountain(self, mountain: Mountain):
         """
         Add a mountain to manager
 
         Args: the mountain to be added
-        Raises: None
+        Raises: ValueError: the mountain itself is already stored, as each stored mountain has a single handle
         Returns: None
-        Complexity: Best case = Worst case = O(1)
+        Complexity: See _index_add
         """
+        if id(mountain) in self.handles:
+            raise ValueError(f"{mountain} is already in the manager")
         # Add a mountain to storage
         self.storage.append(mountain)
-        # Find the maximum difficulty of all mountains added so far
-        if (mountain.difficulty_level > self.max_diff):
-            self.max_diff = mountain.difficulty_level
+        self._index_add(mountain, len(self.storage) - 1)
+        if self.columns is not None:
+            self.columns.append(mountain)
+        self._publish("add", [mountain])
+
+    def add_many(self, mountains):
+        """
+        Add mountains to manager, building their indexes in a single pass
+
+        Args: the mountains to be added, any iterable
+        Raises: ValueError: one of the mountains itself is already stored, or given twice;
+          nothing is added then
+        Returns: None
+        Complexity: See _bucket_add_many, plus O(m) to give the m mountains handles, the handles table
+          growing at most once
+        """
+        mountains = list(mountains)
+        seen = set()
+        stored = not self.handles.is_empty()
+        for mountain in mountains:
+            if id(mountain) in seen or (stored and id(mountain) in self.handles):
+                raise ValueError(f"{mountain} is already in the manager")
+            seen.add(id(mountain))
+        self._add_all(mountains)
+        self._publish("add", mountains)
+
+    def _add_all(self, mountains: list):
+        """
+        Add mountains to manager without publishing the change, see add_many
+        """
+        start = len(self.storage)
+        self.storage.extend(mountains)
+        diffs = [mountain.difficulty_level for mountain in mountains]
+        self.diff_sum += sum(diffs)
+        diff_positions = self._bucket_add_many(self.buckets, self.difficulties, diffs, mountains)
+        length_positions = self._bucket_add_many(
+            self.length_buckets, self.lengths, [mountain.length for mountain in mountains], mountains)
+        self.handles.reserve(len(mountains))
+        for i in range(len(mountains)):
+            self.handles[id(mountains[i])] = [start + i, diff_positions[i], length_positions[i],
+                                              diffs[i], mountains[i].length]
+        if self.columns is not None:
+            self.columns.extend(mountains)
+
+    @classmethod
+    def from_trail(cls, trail, columnar: bool = False):
+        """
+        Create a manager holding every mountain of a trail
+
+        Args: the trail, and whether the manager keeps NumPy columns (see __init__)
+        Raises: ImportError: columnar is True and NumPy is not installed
+        Returns: the manager
+        Complexity: See Trail.collect_all_mountains, plus add_many
+        """
+        manager = cls(columnar)
+        manager.add_many(trail.collect_all_mountains())
+        return manager
+
+    def _remove_at(self, position: int):
+        """
+        Remove the mountain at a position in storage, moving the last mountain into its place
+
+        Args: the position
+        Raises: None
+        Returns: None
+        Complexity: See _index_remove
+        """
+        removed = self.storage[position]
+        self._index_remove(removed)
+        # Remove a mountain from storage
+        # The last mountain is moved into position n, so no mountain has to shift
+        last = self.storage.pop()
+        if last is not removed:
+            self.storage[position] = last
+            self.handles[id(last)][0] = position
+        if self.columns is not None:
+            self.columns.remove(position)
 
     def remove_mountain(self, mountain: Mountain):
         """
         Remove a mountain from manager
 
-        Args: the mountain to be removed
+        Args: the mountain to be removed, or a mountain equal to it
         Raises: ValueError: mountain is not in list
         Returns: None
-        Complexity: Best case = Worst case = O(len(self.storage))
+        Complexity: See _find, plus _index_remove
         """
-        # Remove a mountain from storage
-        # Mountain is removed at position n, and shift all mountains from position n+1 to left
-        self.storage.remove(mountain)
+        position = self._find(mountain)
+        if position is None:
+            raise ValueError(f"{mountain} is not in the manager")
+        removed = self.storage[position]
+        self._remove_at(position)
+        self._publish("remove", [removed])
         return
 
+    def remove_many(self, mountains):
+        """
+        Remove mountains from manager, nothing being removed when one of them is missing
+
+        Args: the mountains to be removed, or mountains equal to them, any iterable
+        Raises: ValueError: a mountain is not in list
+        Returns: None
+        Complexity:
+          Best case = O(m): m is the number of mountains removed, all stored themselves, and fewer than
+            a quarter of the mountains stored, which are then removed one by one
+          Worst case = O(n*p + n + m): n is len(self.storage), and p the number of mountains not stored
+            themselves, searched for in a single pass over storage. When a quarter of the mountains stored
+            or more are removed, the indexes are rebuilt from the mountains kept, see add_many
+        """
+        # The positions of the mountains to be removed, as keys, in the order they are found
+        positions = {}
+        missing = []
+        for mountain in mountains:
+            position = self._find(mountain, equal=False)
+            if position is None or position in positions:
+                missing.append(mountain)
+            else:
+                positions[position] = None
+        # Match the mountains not stored themselves with equal stored ones, in one pass
+        for i in range(len(self.storage)):
+            if not missing:
+                break
+            if i not in positions:
+                for j in range(len(missing)):
+                    if self.storage[i] == missing[j]:
+                        positions[i] = None
+                        missing.pop(j)
+                        break
+        if missing:
+            raise ValueError(f"{missing[0]} is not in the manager")
+
+        removed = [self.storage[position] for position in positions]
+        if 4 * len(positions) < len(self.storage):
+            # Remove from the highest position down, so the last mountain moved is never one to be removed
+            for position in sorted(positions, reverse=True):
+                self._remove_at(position)
+        else:
+            kept = [self.storage[i] for i in range(len(self.storage)) if i not in positions]
+            self._clear(self.columns is not None)
+            self._add_all(kept)
+        self._publish("remove", removed)
+
     def edit_mountain(self, old: Mountain, new: Mountain):
         """
         Edit a mountain from manager
 
+        The mountain replaced is either new itself, when it was stored and then changed in place
+        (old being a copy of it from before the change), or the stored mountain equal to old.
+
         Args: the old mountain to be removed, the new mountain to be added
         Raises: None
         Returns: None
-        Complexity: 
-          Best case = O(1): Mountain is replaced at first position in list
-          Worst case = O(len(self.storage)): Mountain is replaced at last position in list,
+        Complexity:
+          Best case = O(1): new or old is stored itself, and found through its handle
+          Worst case = O(len(self.storage)): the storage is searched for a mountain equal to old,
             or no old mountain is found in storage
         """
-        for i in range(len(self.storage)):
-            if self.storage[i] == old:
-                # Replace specified old mountain with new one
-                self.storage[i] = new
-                break
+        i = self._find(new, equal=False)
+        if i is None:
+            i = self._find(old)
+        if i is None:
+            return
+        stored = self.storage[i]
+        # Move the mountain from the buckets of its old difficulty and length to those of its new ones
+        self._index_remove(stored)
+        # Replace specified old mountain with new one
+        self.storage[i] = new
+        self._index_add(new, i)
+        if self.columns is not None:
+            self.columns.set(i, new)
+        self._publish("edit", [new], [old if stored is new else stored])
         return
 
     def mountains_with_difficulty(self, diff: int):
@@ -66,17 +546,13 @@ class MountainManager:
         Args: difficulty to filter mountains with
         Raises: None
         Returns: list of mountains with this difficulty
-        Complexity: 
-          Best case = Worst case = O(len(self.storage)): 
-            Traverse through entire list to find mountains with matching difficulty
+        Complexity:
+          Best case = Worst case = O(k): k is the number of mountains with this difficulty,
+            copied from the bucket of this difficulty
         """
-        # Initiate a mountain list storing all mountains with this difficulty
-        mountain_list = []
-        for i in range(len(self.storage)):
-            if (self.storage[i].difficulty_level == diff):
-                # Add mountain with this difficulty to list
-                mountain_list.append(self.storage[i])
-        return mountain_list
+        if diff not in self.buckets:
+            return []
+        return list(self.buckets[diff])
 
     def group_by_difficulty(self):
         """
@@ -85,18 +561,101 @@ class MountainManager:
         Args: None
         Raises: None
         Returns: list of lists of mountains
-        Complexity: 
-          Best case = Worst case = O(len(self.storage) * self.max_diff): 
-            Traverse through entire list to find mountains with matching difficulty,
-            with difficulty ranging from 1 to maximum
-        """        
+        Complexity:
+          Best case = Worst case = O(len(self.storage) + len(self.difficulties)):
+            Copy the bucket of every difficulty, in ascending order
+        """
         # Initiate a list storing all diffculty list of mountains
         group_diff_list = []
-        for i in range(self.max_diff):
-            # Get a list of mountain with specific difficulty
-            diff_list = self.mountains_with_difficulty(i+1)
-            if (len(diff_list) != 0):
-                # Add the list to group
-                group_diff_list.append(diff_list)
+        for diff in self.difficulties:
+            # Add the list of mountains with this difficulty to group
+            group_diff_list.append(list(self.buckets[diff]))
         return group_diff_list
 
+    @staticmethod
+    def _bounds(values: list, bounds: tuple):
+        """
+        Find the part of a sorted list within a range
+
+        Args: the sorted list, and the (lowest, highest) values of the range, inclusive,
+          either being None for no bound
+        Raises: None
+        Returns: the (start, end) positions of the values within the range
+        Complexity: Best case = Worst case = O(log(len(values))): binary searches
+        """
+        lo, hi = bounds
+        start = 0 if lo is None else bisect_left(values, lo)
+        end = len(values) if hi is None else bisect_right(values, hi)
+        return start, end
+
+    @staticmethod
+    def _within(value: int, bounds: tuple) -> bool:
+        """
+        Check if a value is in a range of (lowest, highest) values, inclusive, either being None for no bound
+        """
+        lo, hi = bounds
+        return (lo is None or lo <= value) and (hi is None or value <= hi)
+
+    def query(self, difficulty: tuple = None, length: tuple = None):
+        """
+        Return list of mountains with difficulty and length in specified ranges
+
+        Args: the (lowest, highest) difficulty and length, inclusive, where a range or either of its bounds
+          can be None for no bound, e.g. query(difficulty=(3, 7), length=(None, 20))
+        Raises: None
+        Returns: list of mountains within both ranges, in no particular order
+        Complexity:
+          Best case = Worst case = O(log(n) + r + min(k1, k2)): n is len(self.storage), r the number of
+            distinct difficulties and lengths in the ranges, and k1, k2 the numbers of mountains in the
+            difficulty range and in the length range. The buckets of the range holding the fewest mountains
+            are filtered by the other range.
+          When columnar, O(n + k) instead, with the O(n) filter vectorised: k is the number of mountains returned
+        """
+        if difficulty is None and length is None:
+            return list(self.storage)
+        if self.columns is not None:
+            return [self.storage[i] for i in self.columns.filter(difficulty, length).tolist()]
+        ranges = []
+        if difficulty is not None:
+            start, end = self._bounds(self.difficulties, difficulty)
+            ranges.append((self.buckets, self.difficulties[start:end]))
+        if length is not None:
+            start, end = self._bounds(self.lengths, length)
+            ranges.append((self.length_buckets, self.lengths[start:end]))
+        sizes = []
+        for buckets, keys in ranges:
+            size = 0
+            for key in keys:
+                size += len(buckets[key])
+            sizes.append(size)
+        buckets, keys = ranges[sizes.index(min(sizes))]
+
+        mountain_list = []
+        for key in keys:
+            for mountain in buckets[key]:
+                if (difficulty is None or self._within(mountain.difficulty_level, difficulty)) and \
+                        (length is None or self._within(mountain.length, length)):
+                    mountain_list.append(mountain)
+        return mountain_list
+
+    def mean_length_by_difficulty(self) -> list:
+        """
+        Return the mean length of the mountains of each difficulty
+
+        Args: None
+        Raises: None
+        Returns: list of (difficulty, mean length) pairs, by ascending difficulty
+        Complexity:
+          Best case = Worst case = O(len(self.storage)): the length of every mountain of every bucket is summed,
+            or when columnar, the columns are grouped by difficulty (see MountainColumns.mean_length_by_difficulty)
+        """
+        if self.columns is not None:
+            return self.columns.mean_length_by_difficulty()
+        means = []
+        for diff in self.difficulties:
+            bucket = self.buckets[diff]
+            total = 0
+            for mountain in bucket:
+                total += mountain.length
+            means.append((diff, total / len(bucket)))
+        return means
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
+
+from algorithms.mergesort import mergesort
+from data_structures.hash_table import LinearProbeTable
 from mountain import Mountain
 
 class MountainOrganiser:
@@ -12,61 +16,145 @@ class MountainOrganiser:
         :complexity: O(1)
         """
         self.mountain_list = []
+        # The sort key of each mountain of mountain_list, kept from when it was added, so the list can still be
+        # searched when a mountain in it is changed in place
+        self.keys = []
+        # The key each mountain of mountain_list was added with: id(mountain) -> key
+        self.added_keys = LinearProbeTable()
+        # The version of the last change of a MountainManager applied by on_change
+        self.version = 0
+
+    @staticmethod
+    def _key(mountain: Mountain) -> str:
+        """
+        Returns the sort key of a mountain: its length, then its name.
+        :complexity: O(len(mountain.name))
+        """
+        return str(mountain.length) + mountain.name
 
     def cur_position(self, mountain: Mountain) -> int:
         """
         Returns the rank (index) of the mountain given.
         :raises KeyError: when the mountain is not in the list
-        :complexity: worst case O(n) where n is the length of the mountain_list and the mountain is at the end or
-        doesn't exist in the list.
-        best cast O(1) where the mountain is at the start of the list
+        :complexity: best case O(log(n)) where n is the length of the mountain_list, and the mountain is found by
+        binary search on the key it was added with, or else on its key.
+        worst case O(n) where a mountain equal to it was changed in place since it was added, or doesn't exist in
+        the list, and the whole list is searched.
         """
+        key = self.added_keys[id(mountain)] if id(mountain) in self.added_keys else self._key(mountain)
+        for i in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.mountain_list[i] == mountain:
+                return i
         for i in range(len(self.mountain_list)):
             if self.mountain_list[i] == mountain:
                 return i
 
         raise KeyError(mountain)
 
+    def _insert(self, mountain: Mountain) -> None:
+        """
+        Inserts a mountain at its rank.
+        :complexity: O(log(n) + n) where n is the length of the mountain_list: a binary search, then a list insert.
+        """
+        key = self._key(mountain)
+        position = bisect_left(self.keys, key)
+        self.mountain_list.insert(position, mountain)
+        self.keys.insert(position, key)
+        self.added_keys[id(mountain)] = key
+
+    def _remove(self, mountains: tuple) -> None:
+        """
+        Removes the first of mountains in the list, found by the key it was added with, or else a mountain equal to
+        the first of them, found by its key.
+        :raises KeyError: when there is no such mountain.
+        :complexity: O(m*log(n) + k + n) where n is the length of the mountain_list, m the length of mountains and k
+        the number of mountains with the key searched: binary searches, then a list delete.
+        """
+        found = None
+        for mountain in mountains:
+            if id(mountain) in self.added_keys:
+                key = self.added_keys[id(mountain)]
+                for i in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+                    if self.mountain_list[i] is mountain:
+                        found = i
+                        break
+            if found is not None:
+                break
+        if found is None:
+            key = self._key(mountains[0])
+            for i in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+                if self.mountain_list[i] == mountains[0]:
+                    found = i
+                    break
+        if found is None:
+            raise KeyError(mountains[0])
+        if id(self.mountain_list[found]) in self.added_keys:
+            del self.added_keys[id(self.mountain_list[found])]
+        del self.mountain_list[found]
+        del self.keys[found]
+
+    def on_change(self, version: int, events: list) -> None:
+        """
+        Applies a change of a MountainManager, to keep the list in step with it.
+        Subscribe it with manager.subscribe(organiser.on_change, replay=True).
+        :raises KeyError: when a mountain removed or edited is not in the list.
+        :complexity: O(e*(log(n) + n)) where e is the number of events, and n the length of the mountain_list:
+        see _insert and _remove. A run of a adds is merged in at once instead, in O(a*log(a) + n), see add_mountains.
+        """
+        i = 0
+        while i < len(events):
+            event = events[i]
+            i += 1
+            if event.kind == "add":
+                run = [event.mountain]
+                while i < len(events) and events[i].kind == "add":
+                    run.append(events[i].mountain)
+                    i += 1
+                if len(run) == 1:
+                    self._insert(event.mountain)
+                else:
+                    self.add_mountains(run)
+            elif event.kind == "remove":
+                self._remove((event.mountain,))
+            else:
+                # The mountain may have changed again since this event, in the same batch, so it is found by
+                # the key it was added with rather than by event.old
+                self._remove((event.old, event.mountain))
+                self._insert(event.mountain)
+        self.version = version
+
     def add_mountains(self, mountains: list[Mountain]) -> None:
         """
         Adds the given mountain(s) to the list of mountains. This is done by first sorting the provided list by
-        inserting into a new list using binary search O(m*log(n)) where m is the length of the list of the provided
-        mountains, and n is the list of the sorted mountains.
+        merge sort O(m*log(m)) where m is the length of the list of the provided mountains, sorting the pairs of their
+        keys and positions so that mountains with the same key keep their order.
         Then we have 2 lists; the sorted list from the provided mountains, and the existing sorted list from previous
         additions. We use a simple sorting algorithm (same as the combining step of the merge sort algorithm) to sort
         the 2 lists together which yields a time complexity of O(m+n)
         :complexity: Hence, the combination of those 2 steps yields a time complexity of O(m*log(m)+n)
         """
-        mountains_sorted = []
-        for mountain in mountains:
-            # Using binary search to find the index to insert in
-            lower = 0
-            upper = len(mountains_sorted) - 1
-            while lower <= upper:
-                middle = (lower + upper) // 2
-                comp1 = str(mountains_sorted[middle].length) + mountains_sorted[middle].name
-                comp2 = str(mountain.length) + mountain.name
-                if comp1 < comp2:
-                    lower = middle + 1
-                else:
-                    upper = middle - 1
-
-            # Insert at the found index
-            mountains_sorted.insert(lower, mountain)
+        pairs = mergesort([(self._key(mountains[i]), i) for i in range(len(mountains))])
+        keys_sorted = [key for key, _ in pairs]
+        mountains_sorted = [mountains[i] for _, i in pairs]
 
         # Combining 2 sorted lists
         i = 0
         j = 0
         result = []
+        result_keys = []
         while i < len(self.mountain_list) and j < len(mountains_sorted):
-            comp1 = str(self.mountain_list[i].length) + self.mountain_list[i].name
-            comp2 = str(mountains_sorted[j].length) + mountains_sorted[j].name
-            if comp1 < comp2:
+            if self.keys[i] < keys_sorted[j]:
                 result.append(self.mountain_list[i])
+                result_keys.append(self.keys[i])
                 i += 1
             else:
                 result.append(mountains_sorted[j])
+                result_keys.append(keys_sorted[j])
                 j += 1
 
         result = result + self.mountain_list[i:] + mountains_sorted[j:]
         self.mountain_list = result
+        self.keys = result_keys + self.keys[i:] + keys_sorted[j:]
+        self.added_keys.reserve(len(mountains_sorted))
+        for j in range(len(mountains_sorted)):
+            self.added_keys[id(mountains_sorted[j])] = keys_sorted[j]
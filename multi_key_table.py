@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Generic, Iterator, TypeVar
+
+from data_structures.hash_table import LinearProbeTable
+
+V = TypeVar('V')
+
+
+class MultiKeyTable(Generic[V]):
+    """
+    Hash table with N levels of keys, generalising DoubleKeyTable.
+
+    Each level is a LinearProbeTable: the table of level i maps a key to the table of level i+1, and the tables of
+    the last level map a key to its value. A lookup does one probe per level and builds nothing along the way.
+    Keys are strings, ints or tuples of those, with the hash function picked once per table (see hasher_for).
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def __init__(self, levels: int, sizes: list[list | None] | None = None) -> None:
+        """
+        levels is the number of keys of each entry, at least 1.
+        sizes gives the table sizes used at each level, None for the default sizes of LinearProbeTable.
+        :raises ValueError: when levels is less than 1, or sizes does not have one item per level.
+        """
+        if levels < 1:
+            raise ValueError("A MultiKeyTable needs at least one level of keys")
+        if sizes is None:
+            sizes = [None] * levels
+        if len(sizes) != levels:
+            raise ValueError(f"Expected {levels} lists of sizes, got {len(sizes)}")
+        self.levels = levels
+        self.sizes = sizes
+        self.table = LinearProbeTable(sizes[0])
+        # Total number of entries stored
+        self.total_count = 0
+
+    def _find(self, keys: tuple, depth: int) -> LinearProbeTable:
+        """
+        Follow the first depth keys from the top-level table and return the table they lead to.
+        :raises KeyError: when one of these keys doesn't exist.
+        :complexity: O(depth * probe), where probe is the cost of LinearProbeTable._linear_probe.
+        """
+        table = self.table
+        for level in range(depth):
+            table = table.array[table._linear_probe(keys[level], False)][1]
+        return table
+
+    def _check(self, keys: tuple) -> None:
+        """
+        :raises KeyError: when keys does not have one key per level.
+        """
+        if len(keys) != self.levels:
+            raise KeyError(keys)
+
+    def __getitem__(self, keys: tuple) -> V:
+        """
+        Get the value of the entry with these keys, one per level.
+
+        :raises KeyError: when the entry doesn't exist.
+        :complexity: See _find, with depth = levels.
+        """
+        self._check(keys)
+        table = self._find(keys, self.levels - 1)
+        return table.array[table._linear_probe(keys[-1], False)][1]
+
+    def __contains__(self, keys: tuple) -> bool:
+        """
+        Checks to see if the entry with these keys is in the table.
+
+        :complexity: See __getitem__.
+        """
+        try:
+            _ = self[keys]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __setitem__(self, keys: tuple, data: V) -> None:
+        """
+        Set the value of the entry with these keys, one per level, creating the tables of its new keys.
+
+        :raises KeyError: when keys does not have one key per level.
+        :raises FullError: when a table cannot be resized further.
+        :complexity: O(levels * probe), plus the rehash of a table that grows.
+        """
+        self._check(keys)
+        table = self.table
+        for level in range(self.levels):
+            key = keys[level]
+            position = table._linear_probe(key, True)
+            item = table.array[position]
+            if level == self.levels - 1:
+                if item is None:
+                    self.total_count += 1
+                next_table = data
+            elif item is None:
+                next_table = LinearProbeTable(self.sizes[level + 1])
+            else:
+                table = item[1]
+                continue
+            if item is None:
+                table.count += 1
+            table.array[position] = (key, next_table)
+            if len(table) > table.table_size / 2:
+                table._rehash()
+            table = next_table
+
+    def __delitem__(self, keys: tuple) -> None:
+        """
+        Deletes the entry with these keys, and the tables left empty by it.
+
+        :raises KeyError: when the entry doesn't exist.
+        :complexity: O(levels * probe), plus the cluster shuffles of LinearProbeTable.__delitem__.
+        """
+        self._check(keys)
+        tables = [self.table]
+        for level in range(self.levels - 1):
+            table = tables[-1]
+            tables.append(table.array[table._linear_probe(keys[level], False)][1])
+        level = self.levels - 1
+        del tables[level][keys[level]]
+        self.total_count -= 1
+        while level > 0 and tables[level].is_empty():
+            level -= 1
+            del tables[level][keys[level]]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of entries in the table.
+        """
+        return self.total_count
+
+    def iter_items(self, *prefix) -> Iterator[tuple[tuple, V]]:
+        """
+        Returns an iterator of the (keys, value) pairs of every entry whose first keys are prefix (every entry
+        when prefix is empty), in no particular order.
+
+        :raises KeyError: when the prefix doesn't exist, or has as many keys as there are levels.
+        :complexity: O(1) to create, O(T) over the whole iteration where T is the sum of the sizes of the tables
+        walked.
+        """
+        if len(prefix) >= self.levels:
+            raise KeyError(prefix)
+        return self._iter_items(self._find(prefix, len(prefix)), prefix)
+
+    def _iter_items(self, table: LinearProbeTable, prefix: tuple) -> Iterator[tuple[tuple, V]]:
+        """
+        Yields the (keys, value) pairs below table, whose keys start with prefix.
+        """
+        last = len(prefix) == self.levels - 1
+        for item in table.array:
+            if item is not None:
+                if last:
+                    yield prefix + (item[0],), item[1]
+                else:
+                    yield from self._iter_items(item[1], prefix + (item[0],))
+
+    def keys(self, *prefix) -> list:
+        """
+        keys(): returns all top-level keys.
+        keys(k1, ..., ki): returns all keys of level i+1 following k1, ..., ki.
+        :raises KeyError: when the prefix doesn't exist, or has as many keys as there are levels.
+        :complexity: O(i * probe + N) where N is the size of the table of the keys returned.
+        """
+        if len(prefix) >= self.levels:
+            raise KeyError(prefix)
+        return self._find(prefix, len(prefix)).keys()
+
+    def values(self, *prefix) -> list[V]:
+        """
+        Returns the values of every entry whose first keys are prefix (every entry when prefix is empty).
+        :raises KeyError: see iter_items.
+        :complexity: See iter_items.
+        """
+        return [value for _, value in self.iter_items(*prefix)]
+
+    def count(self, *prefix) -> int:
+        """
+        Returns the number of keys of the level following prefix, as len(keys(*prefix)) would.
+        :raises KeyError: see keys.
+        :complexity: O(i * probe), where i is the number of keys in prefix.
+        """
+        if len(prefix) >= self.levels:
+            raise KeyError(prefix)
+        return len(self._find(prefix, len(prefix)))
@@ -0,0 +1,235 @@
+import argparse
+import io
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+from algorithms.mergesort import mergesort
+from algorithms.radix_sort import radix_sort_strings, sorted_unique
+from double_key_table import DoubleKeyTable
+from frozen_hash_table import FrozenInfiniteHashTable
+from infinite_hash_table import ByteAlphabet, InfiniteHashTable, MappedAlphabet
+
+
+def random_names(n: int, seed: int = 1, chars: str = string.ascii_lowercase, shortest: int = 4) -> list[str]:
+    """
+    Generate n distinct names of length shortest to 12.
+    """
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        names.add("".join(rng.choice(chars) for _ in range(rng.randint(shortest, 12))))
+    return list(names)
+
+
+def timed(func) -> float:
+    """
+    Return the wall-clock time taken by func() in seconds.
+    """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def measure_infinite_hash_table(label: str, names: list, **kwargs) -> None:
+    ih = InfiniteHashTable(**kwargs)
+
+    def insert():
+        for i, name in enumerate(names):
+            ih[name] = i
+
+    def lookup():
+        for name in names:
+            ih[name]
+
+    tracemalloc.start()
+    insert_time = timed(insert)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    depth = sum(len(ih.get_location(name)) for name in names) / len(names)
+    print(f"{label} n={len(names)}: insert {insert_time:.3f}s, lookup {timed(lookup):.3f}s, "
+          f"memory {memory / 1e6:.1f}MB, mean depth {depth:.2f}")
+
+
+def bench_infinite_hash_table(n: int) -> None:
+    measure_infinite_hash_table("InfiniteHashTable", random_names(n))
+
+
+def bench_infinite_hash_table_prefix(n: int) -> None:
+    # Families of names that only differ after a long shared prefix
+    names = [f"mountain-range-{name}-north-{peak}" for name in random_names(n // 2)
+             for peak in ("peak", "ridge")]
+    measure_infinite_hash_table("InfiniteHashTable (prefixed)", names)
+    measure_infinite_hash_table("InfiniteHashTable (prefixed, compressed)", names, compress=True)
+
+
+def bench_infinite_hash_table_alphabet(n: int) -> None:
+    # Mixed case and accented names; long enough for ord(char) % 26 to tell them apart
+    names = random_names(n, chars=string.ascii_letters + "áéíóúñüçÁÉÍÓÚÑ", shortest=6)
+    encoded = [name.encode() for name in names]
+    measure_infinite_hash_table("InfiniteHashTable (mixed)", names)
+    measure_infinite_hash_table("InfiniteHashTable (mixed, mapped)", names, alphabet=MappedAlphabet.from_keys(names))
+    measure_infinite_hash_table("InfiniteHashTable (mixed, mapped, sparse)", names,
+                                alphabet=MappedAlphabet.from_keys(names), sparse=True)
+    measure_infinite_hash_table("InfiniteHashTable (mixed, bytes)", encoded, alphabet=ByteAlphabet())
+    measure_infinite_hash_table("InfiniteHashTable (mixed, bytes, sparse)", encoded, alphabet=ByteAlphabet(),
+                                sparse=True)
+
+
+def bench_infinite_hash_table_bulk(n: int) -> None:
+    items = [(name, i) for i, name in enumerate(random_names(n))]
+
+    def insert():
+        ih = InfiniteHashTable()
+        for name, i in items:
+            ih[name] = i
+
+    print(f"InfiniteHashTable n={n}: repeated __setitem__ {timed(insert):.3f}s, "
+          f"from_items {timed(lambda: InfiniteHashTable.from_items(items)):.3f}s")
+
+
+def bench_infinite_hash_table_churn(n: int) -> None:
+    names = random_names(n)
+    ih = InfiniteHashTable.from_items((name, i) for i, name in enumerate(names))
+
+    def churn():
+        for name in names:
+            del ih[name]
+            ih[name] = 0
+
+    print(f"InfiniteHashTable n={n}: delete + reinsert every key {timed(churn):.3f}s")
+
+
+def bench_frozen_hash_table(n: int) -> None:
+    names = random_names(n)
+    items = [(name, i) for i, name in enumerate(names)]
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        FrozenInfiniteHashTable.freeze(InfiniteHashTable.from_items(items), path)
+        frozen = FrozenInfiniteHashTable.open(path)
+
+        def lookup():
+            for name in names:
+                frozen[name]
+
+        print(f"FrozenInfiniteHashTable n={n}: build {timed(lambda: InfiniteHashTable.from_items(items)):.3f}s, "
+              f"open {timed(lambda: FrozenInfiniteHashTable.open(path).close()) * 1000:.3f}ms, "
+              f"lookup {timed(lookup):.3f}s")
+        frozen.close()
+    finally:
+        os.remove(path)
+
+
+def bench_radix_sort(n: int) -> None:
+    # Half of the names are repeated, as in a report over every mountain
+    names = random_names(n // 2, chars=string.ascii_letters + "-")
+    names = names + names[:n - len(names)]
+    random.Random(2).shuffle(names)
+    print(f"Sorting n={n} names: mergesort {timed(lambda: mergesort(names)):.3f}s, "
+          f"radix_sort_strings {timed(lambda: radix_sort_strings(names)):.3f}s, "
+          f"sorted_unique {timed(lambda: sorted_unique(names)):.3f}s, "
+          f"sorted {timed(lambda: sorted(names)):.3f}s")
+
+
+def double_key_pairs(n: int) -> list[tuple[str, str]]:
+    """
+    Generate about 1.6n (key1, key2) pairs: n top-level keys, most with a single second-level key.
+    """
+    names = random_names(n)
+    rng = random.Random(4)
+    return [(name, other) for name in names for other in rng.sample(names[:100], rng.choice([1, 1, 1, 2, 3]))]
+
+
+def bench_double_key_table(n: int) -> None:
+    pairs = double_key_pairs(n)
+    dt = DoubleKeyTable()
+
+    def insert():
+        for i, (key1, key2) in enumerate(pairs):
+            dt[key1, key2] = i
+
+    def lookup():
+        for key1, key2 in pairs:
+            dt[key1, key2]
+
+    tracemalloc.start()
+    insert_time = timed(insert)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"DoubleKeyTable n={len(pairs)}: insert {insert_time:.3f}s, lookup {timed(lookup):.3f}s, "
+          f"memory {memory / 1e6:.1f}MB")
+
+
+def bench_double_key_table_batch(n: int) -> None:
+    # Few top-level keys with many bottom-level keys each, as (difficulty, name) in the graph view
+    triples = [(str(i % 10), name, i) for i, name in enumerate(random_names(n))]
+    random.Random(2).shuffle(triples)
+    keys = [(key1, key2) for key1, key2, _ in triples]
+
+    def insert():
+        dt = DoubleKeyTable()
+        for key1, key2, i in triples:
+            dt[key1, key2] = i
+
+    def lookup():
+        for key in keys:
+            dt[key]
+
+    dt = DoubleKeyTable()
+    print(f"DoubleKeyTable n={len(triples)}: __setitem__ {timed(insert):.3f}s, "
+          f"set_many {timed(lambda: dt.set_many(triples)):.3f}s, "
+          f"__getitem__ {timed(lookup):.3f}s, get_many {timed(lambda: dt.get_many(keys)):.3f}s")
+
+
+def bench_double_key_table_dump(n: int) -> None:
+    dt = DoubleKeyTable()
+    dt.set_many((key1, key2, i) for i, (key1, key2) in enumerate(double_key_pairs(n)))
+    buffer = io.BytesIO()
+    dump_time = timed(lambda: dt.dump(buffer))
+
+    def load():
+        buffer.seek(0)
+        DoubleKeyTable.load(buffer)
+
+    print(f"DoubleKeyTable n={len(dt)}: dump {dump_time:.3f}s ({len(buffer.getvalue()) / 1e6:.1f}MB), "
+          f"load {timed(load):.3f}s, rebuild {timed(lambda: DoubleKeyTable().set_many(dt.iter_items())):.3f}s")
+
+
+BENCHMARKS = {
+    "infinite_hash_table": bench_infinite_hash_table,
+    "infinite_hash_table_prefix": bench_infinite_hash_table_prefix,
+    "infinite_hash_table_alphabet": bench_infinite_hash_table_alphabet,
+    "infinite_hash_table_bulk": bench_infinite_hash_table_bulk,
+    "infinite_hash_table_churn": bench_infinite_hash_table_churn,
+    "frozen_hash_table": bench_frozen_hash_table,
+    "radix_sort": bench_radix_sort,
+    "double_key_table": bench_double_key_table,
+    "double_key_table_batch": bench_double_key_table_batch,
+    "double_key_table_dump": bench_double_key_table_dump,
+}
+
+if __name__ == "__main__":
+
+    p = argparse.ArgumentParser()
+    p.add_argument(
+        "benchmark",
+        help="The benchmark you'd like to run. Leave blank for all benchmarks.",
+        choices=list(BENCHMARKS) + [""],
+        default="",
+        nargs="?",
+    )
+    p.add_argument(
+        "-n",
+        help="Number of keys/items used by each benchmark.",
+        type=int,
+        default=20000,
+    )
+    args = p.parse_args()
+
+    for name, bench in BENCHMARKS.items():
+        if not args.benchmark or args.benchmark == name:
+            bench(args.n)
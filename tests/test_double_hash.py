@@ -1,6 +1,10 @@
+import io
+import os
+import tempfile
 import unittest
 from ed_utils.decorators import number
 
+from data_structures.hash_table import INT_HASHER, STRING_HASHER, LinearProbeTable
 from double_key_table import DoubleKeyTable
 
 class TestDoubleHash(unittest.TestCase):
@@ -123,3 +127,274 @@ class TestDoubleHash(unittest.TestCase):
         # with an iterator.
         self.assertRaises(BaseException, lambda: next(key_iterator))
         self.assertRaises(BaseException, lambda: next(value_iterator))
+
+    @number("3.6")
+    def test_iter_items(self):
+        dt = DoubleKeyTable(sizes=[12], internal_sizes=[5])
+        self.assertEqual(list(dt.iter_items()), [])
+        self.assertEqual(dt.keys(), [])
+        dt["Tim", "Jen"] = 1
+        dt["Amy", "Ben"] = 2
+        dt["Tim", "Bob"] = 3
+
+        self.assertEqual(set(dt.iter_items()), {("Tim", "Jen", 1), ("Amy", "Ben", 2), ("Tim", "Bob", 3)})
+        self.assertEqual(set(dt.iter_items("Tim")), {("Tim", "Jen", 1), ("Tim", "Bob", 3)})
+        self.assertEqual(set(dt.iter_keys()), {"Tim", "Amy"})
+        self.assertEqual(set(dt.iter_keys("Tim")), {"Jen", "Bob"})
+        self.assertEqual(sorted(dt.iter_values()), [1, 2, 3])
+        self.assertRaises(KeyError, lambda: dt.iter_items("Kim"))
+
+        # Iterators are lazy: entries added before they are reached are returned.
+        values = dt.iter_values("Amy")
+        dt["Amy", "Kat"] = 4
+        self.assertEqual(sorted(values), [2, 4])
+
+    @number("3.7")
+    def test_len_count(self):
+        dt = DoubleKeyTable(sizes=[3, 5, 7], internal_sizes=[3, 5])
+        self.assertEqual(len(dt), 0)
+        dt["Tim", "Jen"] = 1
+        dt["Tim", "Bob"] = 2
+        dt["Amy", "Ben"] = 3
+        dt["Tim", "Jen"] = 4
+        self.assertEqual(len(dt), 3)
+        self.assertEqual(dt["Tim", "Jen"], 4)
+        self.assertEqual(dt.count("Tim"), 2)
+        self.assertEqual(dt.count("Amy"), 1)
+        self.assertRaises(KeyError, lambda: dt.count("Kim"))
+
+        # Outer resizes keep every entry reachable.
+        dt["Pip", "Ben"] = 5
+        dt["Kim", "Ben"] = 6
+        self.assertEqual(dt.table_size, 7)
+        self.assertEqual(dt["Tim", "Bob"], 2)
+        self.assertEqual(dt["Pip", "Ben"], 5)
+
+        del dt["Tim", "Jen"]
+        self.assertEqual(len(dt), 4)
+        self.assertEqual(dt.count("Tim"), 1)
+        self.assertIn("(Amy,Ben,3)\n", str(dt))
+
+    @number("3.8")
+    def test_shared_hasher(self):
+        dt = DoubleKeyTable()
+        dt["Tim", "Jen"] = 1
+        dt["Amy", "Ben"] = 2
+        tim = dt.table.array[dt._linear_probe("Tim", "Jen", False)[0]][1]
+        amy = dt.table.array[dt._linear_probe("Amy", "Ben", False)[0]][1]
+        # Every table uses the same hash function object for the same type of keys.
+        self.assertIs(tim.hasher, amy.hasher)
+        self.assertIs(dt.table.hasher, STRING_HASHER)
+        self.assertEqual(dt.table.hash("Tim"), dt.hash1("Tim"))
+        self.assertRaises(AttributeError, setattr, tim, "extra", None)
+
+        # Replacing hash2 is still honoured, through a single adapter per DoubleKeyTable.
+        dt = DoubleKeyTable()
+        dt.hash2 = lambda k, sub_table: 0
+        dt["Tim", "Jen"] = 1
+        dt["Tim", "Bob"] = 2
+        dt["Amy", "Ben"] = 3
+        self.assertEqual(dt._linear_probe("Tim", "Jen", False)[1], 0)
+        self.assertEqual(dt._linear_probe("Tim", "Bob", False)[1], 1)
+
+    @number("3.9")
+    def test_inline_inner_tables(self):
+        dt = DoubleKeyTable(inline_limit=2)
+        dt["Tim", "Jen"] = 1
+        dt["Tim", "Bob"] = 2
+        self.assertEqual(dt.count("Tim"), 2)
+        self.assertEqual(dt["Tim", "Bob"], 2)
+
+        # Going over the limit turns the inner table into a hash table, keeping its pairs.
+        dt["Tim", "Amy"] = 3
+        self.assertEqual(dt["Tim", "Jen"], 1)
+        self.assertEqual(dt["Tim", "Amy"], 3)
+        self.assertEqual(set(dt.iter_keys("Tim")), {"Jen", "Bob", "Amy"})
+
+        dt["Kim", "Jen"] = 4
+        dt["Kim", "Bob"] = 5
+        del dt["Kim", "Jen"]
+        self.assertEqual(dt["Kim", "Bob"], 5)
+        self.assertRaises(KeyError, lambda: dt["Kim", "Jen"])
+        del dt["Kim", "Bob"]
+        self.assertRaises(KeyError, lambda: dt.count("Kim"))
+        self.assertEqual(len(dt), 3)
+
+    @number("3.10")
+    def test_many(self):
+        dt = DoubleKeyTable(inline_limit=2)
+        dt["Tim", "Jen"] = 1
+        dt["Amy", "Ben"] = 2
+        dt.set_many([("Tim", "Bob", 3), ("Kim", "Jen", 4), ("Tim", "Jen", 5), ("Amy", "Kat", 6), ("Tim", "Ann", 7)])
+        self.assertEqual(len(dt), 6)
+        self.assertEqual(dt.count("Tim"), 3)
+        self.assertEqual(dt.get_many([("Tim", "Jen"), ("Kim", "Jen"), ("Tim", "Ann"), ("Amy", "Ben")]), [5, 4, 7, 2])
+        self.assertEqual(dt.get_many([]), [])
+        self.assertRaises(KeyError, dt.get_many, [("Tim", "Jen"), ("Tim", "Kat")])
+        self.assertRaises(KeyError, dt.get_many, [("Pip", "Jen")])
+
+        # Inner tables are grown once to fit every key of the batch.
+        dt = DoubleKeyTable(sizes=[5, 13, 29], internal_sizes=[3, 7, 13, 29])
+        dt.set_many((name, str(i), i) for i, name in enumerate(["Tim"] * 5 + ["Amy", "Ben", "Kim"]))
+        self.assertEqual(dt.table_size, 13)
+        tim = dt.table.array[dt._linear_probe("Tim", "0", False)[0]][1]
+        self.assertEqual(tim.table_size, 13)
+        self.assertEqual(dt.get_many(("Tim", str(i)) for i in range(5)), [0, 1, 2, 3, 4])
+        self.assertEqual(len(dt), 8)
+
+    @number("3.11")
+    def test_keys_for_second(self):
+        for reverse_index in (True, False):
+            dt = DoubleKeyTable(reverse_index=reverse_index)
+            dt["Tim", "Jen"] = 1
+            dt["Amy", "Jen"] = 2
+            dt["Amy", "Ben"] = 3
+            dt["Tim", "Jen"] = 4
+            dt.set_many([("Kim", "Jen", 5), ("Kim", "Ben", 6), ("Amy", "Ben", 7)])
+            self.assertEqual(sorted(dt.keys_for_second("Jen")), ["Amy", "Kim", "Tim"])
+            self.assertEqual(sorted(dt.keys_for_second("Ben")), ["Amy", "Kim"])
+            self.assertEqual(dt.keys_for_second("Pip"), [])
+
+            del dt["Amy", "Jen"]
+            del dt["Kim", "Ben"]
+            self.assertEqual(sorted(dt.keys_for_second("Jen")), ["Kim", "Tim"])
+            self.assertEqual(dt.keys_for_second("Ben"), ["Amy"])
+            del dt["Amy", "Ben"]
+            self.assertEqual(dt.keys_for_second("Ben"), [])
+
+    @number("3.12")
+    def test_key_types(self):
+        dt = DoubleKeyTable(reverse_index=True)
+        for difficulty in range(40):
+            dt[difficulty, "Mt " + str(difficulty)] = difficulty
+            dt[difficulty, "Mt " + str(difficulty + 1)] = -difficulty
+        self.assertIs(dt.table.hasher, INT_HASHER)
+        self.assertEqual(dt.hash1(45), 45 % dt.table_size)
+        self.assertEqual(dt.table.hash(45), dt.hash1(45))
+        self.assertEqual(dt[7, "Mt 7"], 7)
+        self.assertEqual(dt[7, "Mt 8"], -7)
+        self.assertEqual(sorted(dt.keys_for_second("Mt 3")), [2, 3])
+        self.assertEqual(len(dt), 80)
+
+        # Tuples combine the hashes of their items; a hash function is picked once per table.
+        dt = DoubleKeyTable(inline_limit=0)
+        dt[("Alps", 3), 12] = 1
+        dt[("Andes", 3), 12] = 2
+        dt[("Alps", 4), 13] = 3
+        self.assertEqual(dt[("Andes", 3), 12], 2)
+        self.assertEqual(dt.table.hash(("Alps", 4)), dt.hash1(("Alps", 4)))
+        self.assertRaises(TypeError, dt.__setitem__, (("Alps", 3), "Mt"), 0)
+        self.assertRaises(TypeError, DoubleKeyTable().__setitem__, (1.5, "Mt"), 0)
+
+    @number("3.13")
+    def test_snapshot(self):
+        dt = DoubleKeyTable(sizes=[5, 13, 29], reverse_index=True)
+        dt["Tim", "Jen"] = 1
+        dt["Tim", "Bob"] = 2
+        dt["Amy", "Ben"] = 3
+        snapshot = dt.snapshot()
+
+        dt["Tim", "Jen"] = 4
+        dt["Kim", "Jen"] = 5
+        dt["Pip", "Ben"] = 6
+        del dt["Amy", "Ben"]
+        self.assertEqual(dt.table_size, 13)
+        self.assertEqual(dt["Tim", "Jen"], 4)
+        self.assertEqual(sorted(dt.keys_for_second("Jen")), ["Kim", "Tim"])
+
+        # The snapshot still shows the table as it was.
+        self.assertEqual(snapshot.table_size, 5)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot["Tim", "Jen"], 1)
+        self.assertEqual(snapshot["Amy", "Ben"], 3)
+        self.assertNotIn(("Kim", "Jen"), snapshot)
+        self.assertEqual(sorted(snapshot.iter_items()), [("Amy", "Ben", 3), ("Tim", "Bob", 2), ("Tim", "Jen", 1)])
+        self.assertEqual(snapshot.keys_for_second("Jen"), ["Tim"])
+        self.assertRaises(TypeError, snapshot.__setitem__, ("Tim", "Jen"), 0)
+        self.assertRaises(TypeError, snapshot.__delitem__, ("Tim", "Jen"))
+        self.assertIs(snapshot.snapshot(), snapshot)
+
+        # Inner tables that were not written to are still shared.
+        later = dt.snapshot()
+        dt["Pip", "Ann"] = 7
+        self.assertIs(dt.table.array[dt._linear_probe("Tim", "Bob", False)[0]][1],
+                      later.table.array[later._linear_probe("Tim", "Bob", False)[0]][1])
+        self.assertNotIn(("Pip", "Ann"), later)
+        self.assertEqual(len(DoubleKeyTable().snapshot()), 0)
+        self.assertRaises(KeyError, lambda: DoubleKeyTable().snapshot()["Tim", "Jen"])
+
+    @number("3.14")
+    def test_dump_load(self):
+        table = LinearProbeTable([5, 13])
+        for i, name in enumerate(["Tim", "Amy", "Kim", "Jen"]):
+            table[name] = i
+        buffer = io.BytesIO()
+        table.dump(buffer)
+        buffer.seek(0)
+        loaded = LinearProbeTable.load(buffer)
+        self.assertEqual(loaded.table_size, 13)
+        self.assertEqual(loaded.keys(), table.keys())
+        self.assertEqual(loaded["Kim"], 2)
+
+        dt = DoubleKeyTable(sizes=[5, 13, 29], inline_limit=2, reverse_index=True)
+        dt.set_many([("Tim", "Jen", 1), ("Tim", "Bob", [2]), ("Tim", "Ann", None), ("Amy", "Ben", 4),
+                     ("Kim", "Jen", 5)])
+        buffer = io.BytesIO()
+        dt.dump(buffer)
+        DoubleKeyTable().dump(buffer)
+        buffer.seek(0)
+        loaded = DoubleKeyTable.load(buffer)
+        # The same keys at the same positions, without rehashing.
+        self.assertEqual(list(loaded.iter_items()), list(dt.iter_items()))
+        self.assertEqual(loaded.table_size, dt.table_size)
+        self.assertEqual(len(loaded), 5)
+        self.assertEqual(loaded["Tim", "Bob"], [2])
+        self.assertEqual(sorted(loaded.keys_for_second("Jen")), ["Kim", "Tim"])
+        loaded["Amy", "Jen"] = 6
+        self.assertEqual(loaded["Amy", "Jen"], 6)
+        self.assertEqual(len(DoubleKeyTable.load(buffer)), 0)
+        self.assertRaises(ValueError, DoubleKeyTable.load, io.BytesIO(b"LPT1" + bytes(20)))
+
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, "wb") as f:
+                dt.dump(f)
+            opened = DoubleKeyTable.open(path)
+            self.assertEqual(opened["Kim", "Jen"], 5)
+            self.assertRaises(TypeError, opened.__setitem__, ("Kim", "Jen"), 0)
+        finally:
+            os.remove(path)
+
+    @number("3.15")
+    def test_set_many_small_groups(self):
+        # Groups of a single pair grow the inner tables they are added to, as __setitem__ does.
+        for dt in (DoubleKeyTable(), DoubleKeyTable(inline_limit=0)):
+            for i in range(40):
+                dt.set_many([("a", "x" + str(i), i), ("b", "x" + str(i), i)])
+            self.assertEqual(len(dt), 80)
+            self.assertEqual(dt["b", "x39"], 39)
+            for i in range(40):
+                dt.set_many([("a", "y" + str(i), i)])
+            self.assertEqual(len(dt.keys("a")), 80)
+            self.assertEqual(dt["a", "y39"], 39)
+
+    @number("3.16")
+    def test_snapshot_resized_hash(self):
+        class SizedTable(DoubleKeyTable):
+            def hash1(self, key):
+                return ord(key[0]) % self.table_size
+
+        lambda_table = DoubleKeyTable(sizes=[5, 13, 29, 53, 97, 193, 389])
+        lambda_table.hash1 = lambda k: ord(k[0]) % lambda_table.table_size
+        for dt in (SizedTable(sizes=[5, 13, 29, 53, 97, 193, 389]), lambda_table):
+            for key1 in ("Tim", "Amy", "Kim"):
+                dt[key1, "Jen"] = key1
+            snapshot = dt.snapshot()
+            # The live table grows after the snapshot, and the snapshot keeps hashing with its own size.
+            for i in range(100):
+                dt[chr(40 + i), "Jen"] = i
+            self.assertLess(snapshot.table_size, dt.table_size)
+            self.assertEqual([snapshot[key1, "Jen"] for key1 in ("Tim", "Amy", "Kim")], ["Tim", "Amy", "Kim"])
+            self.assertNotIn((chr(40), "Jen"), snapshot)
+            self.assertEqual(dt["Kim", "Jen"], "Kim")
+            self.assertEqual(dt[chr(139), "Jen"], 99)
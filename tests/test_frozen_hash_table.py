@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from ed_utils.decorators import number
+
+from frozen_hash_table import FrozenInfiniteHashTable
+from infinite_hash_table import ByteAlphabet, InfiniteHashTable, MappedAlphabet
+
+class TestFrozenHash(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @number("4.9")
+    def test_freeze(self):
+        items = [("lin", 1), ("leg", [2]), ("mine", None), ("linked", 0), ("limp", "5"),
+                 ("mining", 6), ("jake", 7), ("linger", 8)]
+        for compress in (False, True):
+            ih = InfiniteHashTable.from_items(items, compress)
+            FrozenInfiniteHashTable.freeze(ih, self.path)
+            with FrozenInfiniteHashTable.open(self.path) as frozen:
+                self.assertEqual(len(frozen), 8)
+                for key, value in items:
+                    self.assertEqual(frozen[key], value)
+                    self.assertEqual(frozen.get_location(key), ih.get_location(key))
+                self.assertNotIn("lint", frozen)
+                self.assertNotIn("li", frozen)
+                self.assertRaises(KeyError, lambda: frozen["linkedin"])
+                self.assertRaises(KeyError, lambda: frozen.get_location("mind"))
+
+    @number("4.10")
+    def test_freeze_empty(self):
+        FrozenInfiniteHashTable.freeze(InfiniteHashTable(), self.path)
+        with FrozenInfiniteHashTable.open(self.path) as frozen:
+            self.assertEqual(len(frozen), 0)
+            self.assertNotIn("lin", frozen)
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 64)
+        self.assertRaises(ValueError, lambda: FrozenInfiniteHashTable.open(self.path))
+
+    @number("4.13")
+    def test_freeze_alphabets(self):
+        keys = ["Tin", "nin", "Ñandú", "nandu"]
+        for ih in (InfiniteHashTable.from_items([(key, i) for i, key in enumerate(keys)],
+                                                alphabet=MappedAlphabet.from_keys(keys), sparse=True),
+                   InfiniteHashTable.from_items([(key.encode(), i) for i, key in enumerate(keys)],
+                                                compress=True, alphabet=ByteAlphabet())):
+            FrozenInfiniteHashTable.freeze(ih, self.path)
+            with FrozenInfiniteHashTable.open(self.path) as frozen:
+                for key, value in ih.iter_items():
+                    self.assertEqual(frozen[key], value)
+                    self.assertEqual(frozen.get_location(key), ih.get_location(key))
+                self.assertEqual(len(frozen), 4)
@@ -1,7 +1,7 @@
 import unittest
 from ed_utils.decorators import number
 
-from infinite_hash_table import InfiniteHashTable
+from infinite_hash_table import ByteAlphabet, InfiniteHashTable, MappedAlphabet
 
 class TestInfiniteHash(unittest.TestCase):
 
@@ -67,3 +67,150 @@ class TestInfiniteHash(unittest.TestCase):
         ih["lin"] = 10
         self.assertEqual(ih.get_location("lin"), [4])
         self.assertEqual(len(ih), 1)
+
+    @number("4.3")
+    def test_falsy_values(self):
+        ih = InfiniteHashTable()
+        ih["lin"] = 0
+        ih["leg"] = None
+        ih["linked"] = 0
+        self.assertEqual(ih["lin"], 0)
+        self.assertIsNone(ih["leg"])
+        self.assertEqual(ih.get_location("linked"), [4, 1, 6, 3])
+        ih["lin"] = 1
+        self.assertEqual(ih["lin"], 1)
+        self.assertEqual(len(ih), 3)
+        self.assertRaises(KeyError, lambda: ih["li"])
+        with self.assertRaises(KeyError):
+            del ih["li"]
+        self.assertEqual(len(ih), 3)
+
+    @number("4.4")
+    def test_compressed_locations(self):
+        ih = InfiniteHashTable(compress=True)
+        ih["lin"] = 1
+        ih["leg"] = 2
+        ih["mine"] = 3
+        ih["linked"] = 4
+        self.assertEqual(ih.get_location("lin"), [4, 1, 6, 26])
+        self.assertEqual(ih.get_location("linked"), [4, 1, 6, 3])
+        # "lin"/"linked" share the "n" level, which is compressed away
+        self.assertEqual(ih.table[4].table[1].skip, (6,))
+        ih["limp"] = 5
+        self.assertEqual(ih.get_location("limp"), [4, 1, 5])
+        self.assertEqual(ih.get_location("linked"), [4, 1, 6, 3])
+        self.assertRaises(KeyError, lambda: ih["lit"])
+        self.assertRaises(KeyError, lambda: ih.get_location("linker"))
+
+        del ih["limp"]
+        self.assertEqual(ih.table[4].table[1].skip, (6,))
+        del ih["leg"]
+        self.assertEqual(ih.table[4].skip, (1, 6))
+        self.assertEqual(ih.get_location("lin"), [4, 1, 6, 26])
+        del ih["linked"]
+        self.assertEqual(ih.get_location("lin"), [4])
+        self.assertEqual(len(ih), 2)
+
+    @number("4.5")
+    def test_compressed_shared_prefix(self):
+        ih = InfiniteHashTable(compress=True)
+        names = ["mountain-range-" + str(i) for i in range(10)]
+        for i, name in enumerate(names):
+            ih[name] = i
+        # A single sub-table below the root, instead of one per shared character
+        self.assertEqual(len(ih.table[ih.get_location(names[0])[0]].skip), 14)
+        for i, name in enumerate(names):
+            self.assertEqual(ih[name], i)
+            self.assertEqual(len(ih.get_location(name)), 16)
+
+    @number("4.6")
+    def test_from_items(self):
+        items = [("lin", 1), ("leg", 2), ("mine", 3), ("linked", 4), ("limp", 5),
+                 ("mining", 6), ("jake", 7), ("linger", 8), ("lin", 9)]
+        for compress in (False, True):
+            expected = InfiniteHashTable(compress)
+            for key, value in items:
+                expected[key] = value
+            ih = InfiniteHashTable.from_items(items, compress)
+            self.assertEqual(len(ih), 8)
+            self.assertEqual(ih["lin"], 9)
+            for key, _ in items:
+                self.assertEqual(ih.get_location(key), expected.get_location(key))
+            ih["linking"] = 10
+            self.assertEqual(ih.get_location("linked"), [4, 1, 6, 3, 23])
+        self.assertEqual(len(InfiniteHashTable.from_items({})), 0)
+
+    @number("4.7")
+    def test_iteration(self):
+        keys = ["lin", "leg", "mine", "linked", "limp", "mining", "jake", "linger", "Tin", "n"]
+        for compress in (False, True):
+            ih = InfiniteHashTable.from_items([(key, i) for i, key in enumerate(keys)], compress)
+            self.assertEqual(set(ih.iter_items()), {(key, i) for i, key in enumerate(keys)})
+            self.assertEqual(set(ih.keys()), set(keys))
+            self.assertEqual([key for key, _ in ih.iter_sorted()], sorted(keys))
+            self.assertEqual({key for key, _ in ih.iter_prefix("lin")}, {"lin", "linked", "linger"})
+            self.assertEqual({key for key, _ in ih.iter_prefix("link")}, {"linked"})
+            self.assertEqual({key for key, _ in ih.iter_prefix("mi")}, {"mine", "mining"})
+            self.assertEqual(list(ih.iter_prefix("lix")), [])
+            self.assertEqual(list(ih.iter_prefix("linkedin")), [])
+            self.assertEqual(len(list(ih.iter_prefix(""))), len(keys))
+            self.assertIn("(jake,6)\n", str(ih))
+
+        iterator = InfiniteHashTable().iter_items()
+        self.assertRaises(StopIteration, lambda: next(iterator))
+
+    @number("4.8")
+    def test_occupancy_counters(self):
+        ih = InfiniteHashTable()
+        ih["lin"] = 1
+        ih["leg"] = 2
+        ih["linked"] = 3
+        ih["limp"] = 4
+        branch = ih.table[4]
+        self.assertEqual((branch.leaves, branch.branches, branch.slot_sum), (1, 1, 24))
+        inner = branch.table[1]
+        self.assertEqual((inner.leaves, inner.branches, inner.slot_sum), (1, 1, 11))
+
+        del ih["limp"]
+        self.assertEqual((inner.leaves, inner.branches, inner.slot_sum), (0, 1, 6))
+        del ih["leg"]
+        self.assertEqual(ih.get_location("lin"), [4, 1, 6, 26])
+        del ih["lin"]
+        self.assertEqual(ih.get_location("linked"), [4])
+        self.assertEqual(len(ih), 1)
+
+    @number("4.11")
+    def test_shared_positions(self):
+        ih = InfiniteHashTable()
+        ih["n"] = 1
+        # "T" and "n" are 26 code points apart, so they share every position
+        self.assertRaises(ValueError, lambda: ih.__setitem__("T", 2))
+        self.assertRaises(ValueError, lambda: InfiniteHashTable.from_items([("n", 1), ("T", 2)]))
+        self.assertRaises(ValueError, lambda: InfiniteHashTable.from_items([("nn", 1), ("TT", 2)], compress=True))
+        self.assertEqual(len(ih), 1)
+        self.assertEqual(ih.get_location("n"), [6])
+
+    @number("4.12")
+    def test_alphabets(self):
+        alphabet = MappedAlphabet.from_keys(["Tin", "nin", "Ñandú", "nandu"])
+        self.assertTrue(alphabet.ordered)
+        for sparse in (False, True):
+            ih = InfiniteHashTable(alphabet=alphabet, sparse=sparse)
+            for i, key in enumerate(["Tin", "nin", "Ñandú", "nandu"]):
+                ih[key] = i
+            self.assertEqual(ih.get_location("Tin"), [alphabet.positions["T"]])
+            self.assertEqual(ih.get_location("nin"), [alphabet.positions["n"], alphabet.positions["i"]])
+            self.assertEqual(ih["Ñandú"], 2)
+            self.assertNotIn("Tim", ih)
+            self.assertEqual([key for key, _ in ih.iter_sorted()], ["Tin", "nandu", "nin", "Ñandú"])
+            self.assertEqual(list(ih.iter_prefix("Tim")), [])
+            del ih["nandu"]
+            self.assertEqual(ih.get_location("nin"), [alphabet.positions["n"]])
+
+        keys = [name.encode() for name in ["lin", "leg", "linked", "Ñandú", "l"]]
+        ih = InfiniteHashTable.from_items([(key, i) for i, key in enumerate(keys)], alphabet=ByteAlphabet(), sparse=True)
+        self.assertEqual(ih.TABLE_SIZE, 257)
+        self.assertEqual(ih.get_location(b"lin"), [ord("l"), ord("i"), ord("n"), 256])
+        self.assertEqual(ih.get_location(b"l"), [ord("l"), 256])
+        self.assertEqual([key for key, _ in ih.iter_sorted()], sorted(keys))
+        self.assertEqual({key for key, _ in ih.iter_prefix(b"li")}, {b"lin", b"linked"})
@@ -2,7 +2,9 @@ import unittest
 from ed_utils.decorators import number
 
 from mountain import Mountain
-from mountain_manager import MountainManager
+from mountain_columns import np
+from mountain_manager import MountainEvent, MountainManager
+from trail import Trail, TrailSeries, TrailSplit
 
 class TestInfiniteHash(unittest.TestCase):
 
@@ -56,3 +58,289 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual(len(res), 4)
 
         self.assertEqual(make_set(res[3]), make_set([m10]))
+
+    @number("5.2")
+    def test_difficulty_index(self):
+        m1 = Mountain("m1", 0, 2)
+        m2 = Mountain("m2", 5, 9)
+        m3 = Mountain("m3", 2, 6)
+        m4 = Mountain("m4", 5, 1)
+
+        mm = MountainManager()
+        for mountain in (m1, m2, m3, m4):
+            mm.add_mountain(mountain)
+        ids = lambda groups: [set(id(m) for m in group) for group in groups]
+
+        # Difficulty 0, given to new mountains by the GUI, is kept.
+        self.assertEqual(ids(mm.group_by_difficulty()), ids([[m1], [m3], [m2, m4]]))
+        self.assertEqual(ids([mm.mountains_with_difficulty(0)]), ids([[m1]]))
+
+        # Editing in place, as the GUI does: old is a copy from before the change.
+        old = Mountain(m1.name, m1.difficulty_level, m1.length)
+        m1.difficulty_level = 5
+        mm.edit_mountain(old, m1)
+        self.assertEqual(mm.mountains_with_difficulty(0), [])
+        self.assertEqual(ids(mm.group_by_difficulty()), ids([[m3], [m2, m4, m1]]))
+
+        # Replacing with a new mountain.
+        m5 = Mountain("m5", 1, 3)
+        mm.edit_mountain(Mountain("m3", 2, 6), m5)
+        self.assertEqual(ids(mm.group_by_difficulty()), ids([[m5], [m2, m4, m1]]))
+        self.assertEqual(mm.storage.count(m3), 0)
+
+        mm.remove_mountain(m2)
+        mm.remove_mountain(m5)
+        self.assertEqual(ids(mm.group_by_difficulty()), ids([[m4, m1]]))
+        self.assertRaises(ValueError, mm.remove_mountain, m5)
+
+    @number("5.3")
+    def test_remove_edit_handles(self):
+        mountains = [Mountain("m" + str(i), i % 3, i) for i in range(12)]
+        mm = MountainManager()
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+        ids = lambda ms: set(id(m) for m in ms)
+
+        # Removing moves the last mountain of the storage and of the bucket into the free slots.
+        mm.remove_mountain(mountains[0])
+        mm.remove_mountain(mountains[4])
+        self.assertEqual(len(mm.storage), 10)
+        self.assertEqual(ids(mm.mountains_with_difficulty(0)), ids([mountains[3], mountains[6], mountains[9]]))
+        self.assertEqual(ids(mm.mountains_with_difficulty(1)), ids([mountains[1], mountains[7], mountains[10]]))
+        for i, mountain in enumerate(mm.storage):
+            self.assertEqual(mm.handles[id(mountain)][0], i)
+
+        # An equal mountain is still found when the mountain itself is not stored.
+        mm.remove_mountain(Mountain("m11", 2, 11))
+        self.assertNotIn(id(mountains[11]), ids(mm.storage))
+        self.assertRaises(ValueError, mm.remove_mountain, mountains[11])
+
+        m12 = Mountain("m12", 1, 12)
+        mm.edit_mountain(mountains[2], m12)
+        self.assertEqual(ids(mm.mountains_with_difficulty(2)), ids([mountains[5], mountains[8]]))
+        self.assertIn(id(m12), ids(mm.mountains_with_difficulty(1)))
+        mm.remove_mountain(m12)
+        self.assertEqual(len(mm.storage), 8)
+        self.assertEqual(sum(len(group) for group in mm.group_by_difficulty()), 8)
+
+    @number("5.4")
+    def test_histogram(self):
+        m1 = Mountain("m1", 2, 2)
+        m2 = Mountain("m2", 9, 9)
+        m3 = Mountain("m3", 4, 6)
+        m4 = Mountain("m4", 2, 1)
+
+        mm = MountainManager()
+        self.assertEqual(mm.difficulty_summary(), {"count": 0, "distinct": 0, "min": 0, "max": 0, "mean": 0})
+        for mountain in (m1, m2, m3, m4):
+            mm.add_mountain(mountain)
+        self.assertEqual((mm.min_diff, mm.max_diff), (2, 9))
+        self.assertEqual(mm.count_with_difficulty(2), 2)
+        self.assertEqual(mm.count_with_difficulty(3), 0)
+        self.assertEqual(mm.difficulty_histogram(), [(2, 2), (4, 1), (9, 1)])
+
+        # The maximum goes down when its mountains are removed or edited.
+        mm.remove_mountain(m2)
+        self.assertEqual(mm.max_diff, 4)
+        old = Mountain(m3.name, m3.difficulty_level, m3.length)
+        m3.difficulty_level = 1
+        mm.edit_mountain(old, m3)
+        self.assertEqual((mm.min_diff, mm.max_diff), (1, 2))
+        self.assertEqual(mm.difficulty_summary(), {"count": 3, "distinct": 2, "min": 1, "max": 2, "mean": 5 / 3})
+
+    @number("5.5")
+    def test_query(self):
+        mountains = [Mountain("m" + str(i), i % 10, (i * 7) % 30) for i in range(60)]
+        mm = MountainManager()
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+        ids = lambda ms: sorted(id(m) for m in ms)
+
+        def expected(diff_lo, diff_hi, length_lo, length_hi):
+            return ids(m for m in mm.storage if (diff_lo is None or diff_lo <= m.difficulty_level) and
+                       (diff_hi is None or m.difficulty_level <= diff_hi) and
+                       (length_lo is None or length_lo <= m.length) and (length_hi is None or m.length <= length_hi))
+
+        for diff in [None, (3, 7), (None, 2), (8, None), (11, 20)]:
+            for length in [None, (None, 20), (5, 5), (29, None), (0, 3)]:
+                bounds = (diff or (None, None)) + (length or (None, None))
+                self.assertEqual(ids(mm.query(difficulty=diff, length=length)), expected(*bounds))
+
+        # The index by length follows removals and edits.
+        mm.remove_mountain(mountains[0])
+        old = Mountain(mountains[1].name, mountains[1].difficulty_level, mountains[1].length)
+        mountains[1].length = 100
+        mm.edit_mountain(old, mountains[1])
+        self.assertEqual(ids(mm.query(length=(0, 0))), ids([mountains[30]]))
+        self.assertEqual(ids(mm.query(length=(50, None))), ids([mountains[1]]))
+        self.assertEqual(mm.lengths, sorted(set(m.length for m in mm.storage)))
+
+    @number("5.6")
+    def test_mean_length(self):
+        mm = MountainManager()
+        self.assertEqual(mm.mean_length_by_difficulty(), [])
+        for mountain in (Mountain("m1", 3, 4), Mountain("m2", 1, 5), Mountain("m3", 3, 7)):
+            mm.add_mountain(mountain)
+        self.assertEqual(mm.mean_length_by_difficulty(), [(1, 5.0), (3, 5.5)])
+
+    @number("5.7")
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_columnar(self):
+        mountains = [Mountain("m" + str(i % 7), i % 10, (i * 7) % 30) for i in range(60)]
+        mm = MountainManager(columnar=True)
+        plain = MountainManager()
+        for mountain in mountains:
+            mm.add_mountain(mountain)
+            plain.add_mountain(mountain)
+        ids = lambda ms: sorted(id(m) for m in ms)
+
+        # Removing and editing keep row i of the columns in step with storage[i].
+        m60 = Mountain("m60", 12, 100)
+        for manager in (mm, plain):
+            manager.remove_mountain(mountains[0])
+            manager.remove_mountain(mountains[31])
+            manager.edit_mountain(mountains[5], m60)
+        self.assertEqual(mm.columns.size, len(mm.storage))
+        for i, mountain in enumerate(mm.storage):
+            self.assertEqual(mm.columns.difficulty[i], mountain.difficulty_level)
+            self.assertEqual(mm.columns.length[i], mountain.length)
+            self.assertEqual(mm.columns.names[mm.columns.name_id[i]], mountain.name)
+
+        for diff in [None, (3, 7), (None, 2), (8, None), (11, 20)]:
+            for length in [None, (None, 20), (5, 5), (29, None), (0, 3)]:
+                self.assertEqual(ids(mm.query(difficulty=diff, length=length)),
+                                 ids(plain.query(difficulty=diff, length=length)))
+        self.assertEqual(mm.mean_length_by_difficulty(), plain.mean_length_by_difficulty())
+        self.assertEqual(ids(mm.storage[i] for i in mm.columns.filter(name="m3")),
+                         ids(m for m in mm.storage if m.name == "m3"))
+        self.assertEqual(len(mm.columns.filter(name="nothing")), 0)
+
+    @number("5.8")
+    def test_bulk(self):
+        mountains = [Mountain("m" + str(i), i % 4, (i * 3) % 7) for i in range(40)]
+        mm = MountainManager()
+        mm.add_mountain(mountains[0])
+        mm.add_many(mountains[1:])
+        one_by_one = MountainManager()
+        for mountain in mountains:
+            one_by_one.add_mountain(mountain)
+        ids = lambda ms: set(id(m) for m in ms)
+        self.assertEqual([ids(group) for group in mm.group_by_difficulty()],
+                         [ids(group) for group in one_by_one.group_by_difficulty()])
+        self.assertEqual(mm.lengths, one_by_one.lengths)
+        self.assertEqual(mm.difficulty_summary(), one_by_one.difficulty_summary())
+        for i, mountain in enumerate(mm.storage):
+            position = mm.handles[id(mountain)]
+            self.assertEqual(position[0], i)
+            self.assertIs(mm.buckets[mountain.difficulty_level][position[1]], mountain)
+            self.assertIs(mm.length_buckets[mountain.length][position[2]], mountain)
+
+        # A few mountains are removed one by one, many by rebuilding the indexes.
+        # Nothing is removed when one of them is missing.
+        self.assertRaises(ValueError, mm.remove_many, [mountains[2], Mountain("m2", 2, 6)])
+        self.assertEqual(len(mm.storage), 40)
+        mm.remove_many([mountains[2], Mountain("m5", 1, 1)])
+        self.assertEqual(ids(mm.storage), ids(mountains) - ids([mountains[2], mountains[5]]))
+        mm.remove_many(mountains[10:40])
+        self.assertEqual(ids(mm.storage), ids(mountains[:10]) - ids([mountains[2], mountains[5]]))
+        self.assertEqual(ids(mm.query(difficulty=(1, 1))), ids([mountains[1], mountains[9]]))
+        for i, mountain in enumerate(mm.storage):
+            self.assertEqual(mm.handles[id(mountain)][0], i)
+
+    @number("5.9")
+    def test_from_trail(self):
+        m1, m2, m3 = Mountain("m1", 2, 2), Mountain("m2", 5, 9), Mountain("m3", 2, 6)
+        trail = Trail(TrailSplit(
+            Trail(TrailSeries(m1, Trail(None))),
+            Trail(None),
+            Trail(TrailSeries(m2, Trail(TrailSeries(m3, Trail(None))))),
+        ))
+        mm = MountainManager.from_trail(trail)
+        ids = lambda ms: set(id(m) for m in ms)
+        self.assertEqual(ids(mm.storage), ids([m1, m2, m3]))
+        self.assertEqual([ids(group) for group in mm.group_by_difficulty()], [ids([m1, m3]), ids([m2])])
+        self.assertEqual(MountainManager.from_trail(Trail(None)).storage, [])
+
+    @number("5.10")
+    def test_events(self):
+        m1, m2, m3, m4 = (Mountain("m" + str(i), i, i) for i in range(1, 5))
+        mm = MountainManager()
+        mm.add_mountain(m1)
+        changes = []
+        callback = mm.subscribe(lambda version, events: changes.append((version, events)), replay=True)
+        self.assertEqual(changes, [(1, [MountainEvent("add", m1)])])
+
+        changes.clear()
+        mm.add_many([m2, m3])
+        mm.remove_mountain(Mountain("m2", 2, 2))
+        self.assertEqual(mm.version, 3)
+        self.assertEqual([version for version, _ in changes], [2, 3])
+        self.assertEqual(changes[0][1], [MountainEvent("add", m2), MountainEvent("add", m3)])
+        self.assertIs(changes[1][1][0].mountain, m2)
+
+        # Edits give the mountain replaced: the copy from before an edit in place, or the stored mountain.
+        changes.clear()
+        old = Mountain(m1.name, m1.difficulty_level, m1.length)
+        m1.length = 10
+        mm.edit_mountain(old, m1)
+        mm.edit_mountain(Mountain("m3", 3, 3), m4)
+        self.assertIs(changes[0][1][0].old, old)
+        self.assertIs(changes[1][1][0].old, m3)
+        self.assertIs(changes[1][1][0].mountain, m4)
+
+        # A batch is published once, when it ends, with the version of its last change.
+        # Failed and empty changes are neither counted nor published.
+        changes.clear()
+        with mm.batch():
+            mm.add_mountain(m2)
+            with mm.batch():
+                mm.remove_many([m2, m4])
+            self.assertEqual(changes, [])
+        self.assertRaises(ValueError, mm.remove_mountain, m3)
+        mm.add_many([])
+        self.assertEqual(changes, [(7, [MountainEvent("add", m2), MountainEvent("remove", m2),
+                                        MountainEvent("remove", m4)])])
+        mm.unsubscribe(callback)
+        mm.add_mountain(m2)
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(mm.version, 8)
+
+    @number("5.11")
+    def test_edit_mismatched_old(self):
+        a, b = Mountain("a", 1, 4), Mountain("b", 2, 6)
+        mm = MountainManager()
+        mm.add_many([a, b])
+        ids = lambda groups: [set(id(m) for m in group) for group in groups]
+
+        # new is stored itself, so it is moved from the buckets it was indexed in, whatever old says.
+        mm.edit_mountain(Mountain("zz", 9, 9), b)
+        mm.edit_mountain(Mountain("x", 1, 4), b)
+        self.assertEqual(ids(mm.group_by_difficulty()), ids([[a], [b]]))
+        self.assertEqual(mm.lengths, [4, 6])
+
+        # A mountain changed in place without edit_mountain is still removed from the buckets it is in.
+        a.difficulty_level = 5
+        a.length = 7
+        mm.remove_mountain(a)
+        self.assertEqual(mm.difficulty_histogram(), [(2, 1)])
+        self.assertEqual(mm.lengths, [6])
+        self.assertEqual(mm.difficulty_summary()["mean"], 2)
+
+    @number("5.12")
+    def test_duplicate_mountain(self):
+        m1, m2, m3 = Mountain("m1", 1, 1), Mountain("m2", 2, 2), Mountain("m3", 3, 3)
+        mm = MountainManager()
+        mm.add_mountain(m1)
+        # A stored mountain cannot be stored again, even in a bulk add, which then adds nothing.
+        self.assertRaises(ValueError, mm.add_mountain, m1)
+        self.assertRaises(ValueError, mm.add_many, [m2, m1])
+        self.assertRaises(ValueError, mm.add_many, [m2, m3, m2])
+        self.assertEqual(mm.storage, [m1])
+        # An equal mountain is a different mountain.
+        mm.add_many([m2, Mountain("m1", 1, 1)])
+        self.assertEqual(len(mm.storage), 3)
+
+        mm.remove_mountain(m1)
+        mm.remove_mountain(m1)
+        self.assertEqual(mm.storage, [m2])
+        self.assertRaises(ValueError, mm.remove_mountain, m1)
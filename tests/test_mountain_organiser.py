@@ -2,6 +2,7 @@ import unittest
 from ed_utils.decorators import number
 
 from mountain import Mountain
+from mountain_manager import MountainManager
 from mountain_organiser import MountainOrganiser
 
 class TestInfiniteHash(unittest.TestCase):
@@ -31,3 +32,48 @@ class TestInfiniteHash(unittest.TestCase):
         self.assertEqual([mo.cur_position(m) for m in [m1, m2, m3, m4, m5, m6, m7, m8, m9]], [1, 8, 3, 0, 4, 2, 6, 7, 5])
 
         self.assertRaises(KeyError, lambda: mo.cur_position(m10))
+
+    @number("6.2")
+    def test_follow_manager(self):
+        mountains = [Mountain("m" + str(i), i % 3, (i * 7) % 10) for i in range(20)]
+        mm = MountainManager()
+        mm.add_many(mountains[:10])
+        mo = MountainOrganiser()
+        mm.subscribe(mo.on_change, replay=True)
+
+        def check():
+            expected = MountainOrganiser()
+            expected.add_mountains(mm.storage)
+            self.assertEqual(mo.mountain_list, expected.mountain_list)
+            self.assertEqual(mo.keys, [str(m.length) + m.name for m in mo.mountain_list])
+            self.assertEqual(mo.version, mm.version)
+
+        check()
+        mm.add_many(mountains[10:])
+        mm.remove_many(mountains[3:7])
+        check()
+        # Editing in place, as the GUI does, and replacing.
+        old = Mountain(mountains[0].name, mountains[0].difficulty_level, mountains[0].length)
+        mountains[0].length = 99
+        mm.edit_mountain(old, mountains[0])
+        mm.edit_mountain(Mountain(mountains[1].name, mountains[1].difficulty_level, mountains[1].length),
+                         Mountain("new", 1, 0))
+        check()
+        self.assertIs(mo.mountain_list[mo.cur_position(mountains[0])], mountains[0])
+
+        # In a batch, the events are applied after every change of the batch was made: a mountain added, or
+        # edited in place, may have been changed in place again since.
+        def edit_in_place(mountain, length):
+            old = Mountain(mountain.name, mountain.difficulty_level, mountain.length)
+            mountain.length = length
+            mm.edit_mountain(old, mountain)
+
+        m20 = Mountain("m20", 1, 5)
+        with mm.batch():
+            mm.add_mountain(m20)
+            edit_in_place(m20, 8)
+            edit_in_place(mountains[2], 3)
+            edit_in_place(mountains[2], 0)
+            edit_in_place(mountains[2], 7)
+        check()
+        self.assertIs(mo.mountain_list[mo.cur_position(m20)], m20)
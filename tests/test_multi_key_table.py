@@ -0,0 +1,71 @@
+import unittest
+from ed_utils.decorators import number
+
+from multi_key_table import MultiKeyTable
+
+class TestMultiKeyTable(unittest.TestCase):
+
+    @number("8.1")
+    def test_set_get(self):
+        mt = MultiKeyTable(3, sizes=[[5, 13], [3, 7], None])
+        mt[3, 120, "Everest"] = 1
+        mt[3, 120, "Denali"] = 2
+        mt[3, 80, "Fuji"] = 3
+        mt[1, 80, "Snowdon"] = 4
+        mt[3, 120, "Everest"] = 5
+        self.assertEqual(len(mt), 4)
+        self.assertEqual(mt[3, 120, "Everest"], 5)
+        self.assertEqual(mt[1, 80, "Snowdon"], 4)
+        self.assertIn((3, 80, "Fuji"), mt)
+        self.assertNotIn((1, 80, "Fuji"), mt)
+        self.assertNotIn((3, 80), mt)
+        self.assertRaises(KeyError, lambda: mt[2, 80, "Fuji"])
+        self.assertRaises(KeyError, mt.__setitem__, (3, 80), 0)
+        self.assertRaises(ValueError, MultiKeyTable, 2, [None])
+
+        # Tables grow with their own sizes at each level.
+        for length in range(3):
+            mt[2, length, "Hill"] = length
+        self.assertEqual(mt.table.table_size, 13)
+        self.assertEqual(mt.table.array[mt.table._linear_probe(2, False)][1].table_size, 7)
+        self.assertEqual(mt[2, 1, "Hill"], 1)
+
+    @number("8.2")
+    def test_prefix(self):
+        mt = MultiKeyTable(3)
+        mt[3, 120, "Everest"] = 1
+        mt[3, 120, "Denali"] = 2
+        mt[3, 80, "Fuji"] = 3
+        mt[1, 80, "Snowdon"] = 4
+        self.assertEqual(sorted(mt.keys()), [1, 3])
+        self.assertEqual(sorted(mt.keys(3)), [80, 120])
+        self.assertEqual(sorted(mt.keys(3, 120)), ["Denali", "Everest"])
+        self.assertEqual(mt.count(3), 2)
+        self.assertEqual(mt.count(3, 120), 2)
+        self.assertEqual(sorted(mt.values(3)), [1, 2, 3])
+        self.assertEqual(sorted(mt.iter_items(3, 120)), [((3, 120, "Denali"), 2), ((3, 120, "Everest"), 1)])
+        self.assertEqual(len(list(mt.iter_items())), 4)
+        self.assertRaises(KeyError, mt.keys, 2)
+        self.assertRaises(KeyError, mt.keys, 3, 120, "Everest")
+
+    @number("8.3")
+    def test_delete(self):
+        mt = MultiKeyTable(3)
+        mt[3, 120, "Everest"] = 1
+        mt[3, 120, "Denali"] = 2
+        mt[3, 80, "Fuji"] = 3
+        del mt[3, 120, "Everest"]
+        self.assertEqual(mt.keys(3, 120), ["Denali"])
+        del mt[3, 120, "Denali"]
+        # Tables left empty are removed.
+        self.assertEqual(mt.keys(3), [80])
+        del mt[3, 80, "Fuji"]
+        self.assertEqual(mt.keys(), [])
+        self.assertEqual(len(mt), 0)
+        self.assertRaises(KeyError, mt.__delitem__, (3, 80, "Fuji"))
+
+        single = MultiKeyTable(1)
+        single["Everest",] = 8848
+        self.assertEqual(single["Everest",], 8848)
+        del single["Everest",]
+        self.assertEqual(len(single), 0)
@@ -0,0 +1,22 @@
+import random
+import unittest
+from ed_utils.decorators import number
+
+from algorithms.radix_sort import radix_sort_strings, sorted_unique
+
+class TestRadixSort(unittest.TestCase):
+
+    @number("7.1")
+    def test_sort(self):
+        names = ["linger", "lin", "Ñandú", "", "leg", "lin", "Tin", "nin", "linked", "l", "Tin"]
+        self.assertEqual(radix_sort_strings(names), sorted(names))
+        self.assertEqual(sorted_unique(names), sorted(set(names)))
+        self.assertEqual(radix_sort_strings([]), [])
+        self.assertEqual(sorted_unique(iter(["b", "a", "b"])), ["a", "b"])
+
+    @number("7.2")
+    def test_random(self):
+        rng = random.Random(3)
+        names = ["".join(rng.choice("abcTnñ-") for _ in range(rng.randint(0, 8))) for _ in range(2000)]
+        self.assertEqual(radix_sort_strings(names), sorted(names))
+        self.assertEqual(sorted_unique(names), sorted(set(names)))